@@ -3,131 +3,42 @@ import pandas as pd
 import datetime as dt
 import os
 import base64
-from typing import List, Dict, Tuple
-
-# Optional: Supabase for cloud persistence (auto if secrets exist)
-try:
-    from supabase import create_client, Client  # pip install supabase
-except Exception:
-    create_client = None
-    Client = None
-
-# Optional: Supabase for cloud persistence (auto if secrets exist)
-try:
-    from supabase import create_client, Client  # pip install supabase
-except Exception:
-    create_client = None
-    Client = None
+import io
+import uuid
+from typing import Dict, Optional, Tuple
+from tracker.storage import (DEFAULT_USER, SUPABASE_SCHEMA, Storage, CsvStorage, SqliteStorage,
+                             SupabaseStorage, migrate_csv_to_sqlite, partition_path, user_slug, write_csv_export)
+from tracker.snapshot import LogSnapshot
+from tracker.aggregates import METRICS, SessionAggregates
+from tracker.analytics import GROUPINGS, MEASURES, PERIODS, TREND_DAYS, AnalyticsCache
+from tracker.recommend import LatestSessions, next_targets
+from tracker.metrics import estimate_1rm, volume
+from tracker.writeback import WriteBehindQueue
+from tracker.program import AVATARS, level_and_progress
+from tracker.plans import PlanError, PlanRegistry, plan_rows
+from tracker.diagnostics import InstrumentedStorage, Tracer
+from tracker.prefetch import FetchTimeout, Prefetch, fetch_pool
+from tracker.importer import import_log
 
 # ──────────────────────────────────────────────────────────────
-# CONFIG & THEME (+ optional Supabase cloud storage) (+ optional Supabase cloud storage)
+# CONFIG & THEME (+ optional Supabase cloud storage)
 # ──────────────────────────────────────────────────────────────
 st.set_page_config(page_title="🏋️ Workout Tracker", page_icon="💪", layout="wide")
 LOG_FILE = "workout_log.csv"            # per-set/per-task log
 XP_LOG_FILE = "xp_log.csv"              # XP gamification log
-TEMPLATE_FILE = "split_template.csv"    # exportable plan
+DB_FILE = "workout.db"                  # SQLite store (local default)
+JOURNAL_FILE = "pending_writes.jsonl"   # Supabase writes not yet flushed
+TEMPLATE_FILE = "split_template.csv"    # exportable plan (loadable as a plan file)
+PLAN_FILE = os.environ.get("WORKOUT_PLAN_FILE")  # .csv/.json plan; unset = built-in program
+RECENT_PAGE_SIZE = 20                   # rows per Recent Entries page
+ONE_RM_FORMULA = os.environ.get("WORKOUT_1RM_FORMULA", "epley")  # one of tracker.metrics.FORMULAS
+DIAGNOSTICS = os.environ.get("WORKOUT_DIAGNOSTICS", "") not in ("", "0")  # panel on by default
+TRACE_FILE = os.environ.get("WORKOUT_TRACE_FILE")                        # JSONL trace of every run
+USER_DEFAULT = os.environ.get("WORKOUT_USER", DEFAULT_USER)              # athlete when nobody is signed in
+FETCH_TIMEOUT = float(os.environ.get("WORKOUT_FETCH_TIMEOUT", "10"))     # seconds a section waits for its data
 
 # Optional local avatar folder (drop your own images here)
 AVATAR_FOLDER = "avatars"
-AVATARS = {
-    0: ("rookie", "Rookie"),
-    1: ("cadet", "Cadet"),
-    2: ("contender", "Contender"),
-    3: ("warrior", "Warrior"),
-    4: ("champion", "Champion"),
-    5: ("legend", "Legend"),
-}
-LEVEL_THRESHOLDS = [
-    (0, 0), (1, 150), (2, 350), (3, 650), (4, 1050), (5, 1600)
-]
-
-# XP awards (rough heuristic)
-XP = {
-    "compound": 12,
-    "unilateral": 10,
-    "isolation": 8,
-    "core": 10,
-    "erectors": 10,
-    "balance": 8,
-    "grip": 8,
-    "core/grip": 10,
-}
-
-# ──────────────────────────────────────────────────────────────
-# PROGRAM (PPL A/B with core, balance, grip, erectors)
-# rep tuples are (min_reps, max_reps). None => time/steps target in `duration`.
-# `tip` shows a concise cue; `icon` decorates the UI.
-SPLIT: Dict[str, List[Dict]] = {
-    "Push A — Chest + Triceps + Core": [
-        {"exercise": "Dumbell Bench Press", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🏋️", "tip": "Elbows ~45°, 2–3s eccentric"},
-        {"exercise": "Cable Fly", "sets": 3, "reps": (8, 12), "category": "isolation", "icon": "🦋", "tip": "Hug a tree, squeeze"},
-        {"exercise": "Incline  Cable Fly", "sets": 3, "reps": (8, 12), "category": "isolation", "icon": "🔥", "tip": "Feel chest during ecentric and concentric"},
-        {"exercise": "Incline Dumbbell Press", "sets": 3, "reps": (8, 10), "category": "compound", "icon": "📈", "tip": "Slight arch, deep stretch"},
-        {"exercise": "Weighted Dips", "sets": 3, "reps": (6, 12), "category": "compound", "icon": "😮‍💨", "tip": "Lean forward for better muscle engagement"},
-        {"exercise": "Overhead DB Triceps Extension", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "🎯", "tip": "Long head stretch"},
-        {"exercise": "Seated DB Lateral Raise", "sets": 3, "reps": (15, 20), "category": "isolation", "icon": "🏹", "tip": "Lead with elbows"},
-        {"exercise": "Rope Pushdown", "sets": 3, "reps": (12, 15), "category": "isolation", "icon": "🪢", "tip": "Flare rope at bottom"},
-        {"exercise": "Weighted Decline Sit-Up", "sets": 3, "reps": (10, 12), "category": "core", "icon": "🧱", "tip": "Ribs to pelvis"},
-        {"exercise": "Pallof Press", "sets": 3, "reps": (12, 15), "category": "core", "icon": "🧭", "tip": "Resist rotation"},
-    ],
-    
-    "Pull A — Width + Posterior + Grip + Lower Back": [
-        {"exercise": "Wide-Grip Pull-Up / Pulldown", "sets": 4, "reps": (6, 10), "category": "compound", "icon": "🦅", "tip": "Drive scapular depression"},
-        {"exercise": "T-Bar / Machine Row", "sets": 4, "reps": (8, 10), "category": "compound", "icon": "⚓", "tip": "Chest up"},
-        {"exercise": "Single-Arm DB Row", "sets": 3, "reps": (10, 12), "category": "unilateral", "icon": "🧲", "tip": "Shoulder square"},
-        {"exercise": "Reverse Fly / Face Pull", "sets": 3, "reps": (15, 20), "category": "isolation", "icon": "🎣", "tip": "ER + scap set"},
-        {"exercise": "Preacher Curl", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "🧪", "tip": "No shoulder swing"},
-        {"exercise": "Zottman / Reverse Curl", "sets": 3, "reps": (12, 15), "category": "forearms", "icon": "🔁", "tip": "Slow negative"},
-        {"exercise": "Back Extension (weighted)", "sets": 3, "reps": (15, 20), "category": "erectors", "icon": "🧱", "tip": "Neutral spine"},
-        {"exercise": "Plate Pinch Hold (sec)/ Farmer Walks", "sets": 3, "reps": None, "duration": 45, "category": "grip", "icon": "📀", "tip": "Thumbs crush"},
-    ],
-    
-   
-    "Legs A — Quads + Balance + Core": [
-        {"exercise": "Front / Safety Bar Squat", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🧊", "tip": "Upright torso, brace"},
-        {"exercise": "Bulgarian Split Squat (supported)", "sets": 3, "reps": (10, 12), "category": "unilateral", "icon": "🦵", "tip": "Use post for balance"},
-        {"exercise": "Walking Lunge / Step-Up", "sets": 3, "reps": (10, 10), "category": "unilateral", "icon": "🚶", "tip": "Knee tracks toes"},
-        {"exercise": "Leg Extension", "sets": 3, "reps": (12, 15), "category": "isolation", "icon": "🦿", "tip": "Squeeze at top"},
-        {"exercise": "Hanging Leg Raise / Ab Rollout", "sets": 3, "reps": (12, 15), "category": "core", "icon": "🏗️", "tip": "Posterior tilt"},
-        {"exercise": "Pallof Press", "sets": 3, "reps": (12, 15), "category": "core", "icon": "🧭", "tip": "Neutral pelvis"},
-        {"exercise": "Single-Leg Balance Reach (opt)", "sets": 2, "reps": (10, 10), "category": "balance", "icon": "🦶", "tip": "Soft knee, hinge"},
-    ],
-    "Push B — Shoulders + Triceps + Core": [
-        {"exercise": "Standing Overhead Press", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "📏", "tip": "Glutes tight, chin back"},
-        {"exercise": "Arnold Press", "sets": 3, "reps": (8, 10), "category": "compound", "icon": "🎛️", "tip": "Full ROM"},
-        {"exercise": "Barbell Front Delts", "sets": 3, "reps": (8, 12), "category": "isolation", "icon": "🛰️", "tip": "Slow, engaged retraction"},
-        {"exercise": "Cable Lateral Raise (slow ecc)", "sets": 3, "reps": (15, 20), "category": "isolation", "icon": "🌙", "tip": "2–3s down"},
-        {"exercise": "Machine Chest Press", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🛡️", "tip": "Neutral grip"},
-        {"exercise": "Cable Decline Flys", "sets": 3, "reps": (8, 15), "category": "isolation", "icon": "🎃", "tip": "Feel chest engage during reps"},
-        {"exercise": "Face Pull + Extension", "sets": 3, "reps": (12, 15), "category": "isolation", "icon": "🎯", "tip": "Constant tension"},
-        {"exercise": "Skullcrusher / Rope Ext.", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "💥", "tip": "Elbows still"},
-        {"exercise": "Cable Woodchop (per side)", "sets": 3, "reps": (12, 12), "category": "core", "icon": "🪓", "tip": "Hips quiet"},
-        {"exercise": "Side Plank Hip Raise (sec)", "sets": 3, "reps": None, "duration": 30, "category": "core", "icon": "🧱", "tip": "Ribs down"},
-    ],
-
-     "Pull B — Back Thickness + Biceps + Grip": [
-        {"exercise": "Barbell Row / Pendlay", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🛠️", "tip": "Torso ~15°, brace"},
-        {"exercise": "Weighted Pull-Up / Lat Pulldown", "sets": 4, "reps": (8, 10), "category": "compound", "icon": "🧗", "tip": "Drive elbows to hips"},
-        {"exercise": "Chest-Supported Row", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🧱", "tip": "Kelso Shrugs after failure"},
-        {"exercise": "Seated Cable Row", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🎣", "tip": "Pause at chest"},
-        {"exercise": "Barbell Curl", "sets": 3, "reps": (8, 10), "category": "isolation", "icon": "🌀", "tip": "Pin elbows"},
-        {"exercise": "Hammer Curl", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "🔨", "tip": "Neutral grip"},
-        {"exercise": "Farmer's Carry (steps)", "sets": 3, "reps": None, "duration": 40, "category": "grip", "icon": "🧺", "tip": "Tall, tight ribs"},
-    ],
-
-    "Legs B — Glutes + Hamstrings + Lower Back + Core": [
-        {"exercise": "Romanian Deadlift / New Deadlift Machine??", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🪵", "tip": "Hinge; shins vertical"},
-        {"exercise": "Seated Good Morning", "sets": 3, "reps": (10, 12), "category": "erectors", "icon": "🪑", "tip": "Brace, move hips"},
-        {"exercise": "Hip Thrust / Glute Bridge", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🍑", "tip": "Posterior tilt"},
-        {"exercise": "Hamstring Curl", "sets": 3, "reps": (10, 15), "category": "isolation", "icon": "🧵", "tip": "Toes neutral"},
-        {"exercise": "Weighted Side Plank (sec)", "sets": 3, "reps": None, "duration": 30, "category": "core", "icon": "🧱", "tip": "Hips stacked"},
-        {"exercise": "Back Extension / Reverse Hyper", "sets": 3, "reps": (15, 20), "category": "erectors", "icon": "🔁", "tip": "Control end-range"},
-        {"exercise": "Cable Crunch", "sets": 3, "reps": (10, 15), "category": "core", "icon": "🛞", "tip": "Slow concentric movement, avoid pulling with arms"},
-        {"exercise": "Suitcase Carry (steps)", "sets": 3, "reps": None, "duration": 40, "category": "core/grip", "icon": "🧳", "tip": "Anti-lean"},
-        {"exercise": "Kettlebell toe-touches", "sets": 3, "reps": (12, 20), "category": "core", "icon": "🍄", "tip": "Engage core to avoid lower back activation"},
-
-    ],
-}
 
 # ──────────────────────────────────────────────────────────────
 # STYLING (vibes like your piano tracker)
@@ -153,72 +64,138 @@ st.markdown("""
   <a href='#plan'>📋 Plan</a>
   <a href='#log'>📝 Log</a>
   <a href='#progress'>📊 Progress</a>
+  <a href='#analytics'>📈 Analytics</a>
   <a href='#avatar'>🧟 Avatar</a>
 </div>
 """, unsafe_allow_html=True)
 
 st.markdown("<div class='big-title'>💪 Workout Tracker</div>", unsafe_allow_html=True)
 
+# Opt-in hot-path diagnostics: sections and storage calls are timed per run
+# and shown in the sidebar (see tracker/diagnostics.py).
+TRACE: Tracer = st.session_state.setdefault("tracer", Tracer(trace_path=TRACE_FILE))
+TRACE.enabled = st.sidebar.toggle("🔬 Diagnostics", value=DIAGNOSTICS, key="diagnostics")
+TRACE.begin()
+
 # ──────────────────────────────────────────────────────────────
-# DATA IO  (Supabase if configured; else CSV)  (Supabase if configured; else CSV)
+# DATA IO  (Supabase if configured; else SQLite, or CSV with WORKOUT_BACKEND=csv)
 # ──────────────────────────────────────────────────────────────
-DEFAULT_LOG_COLUMNS = [
-    "date","week","day_name","exercise","set_number","reps","weight","rir","tempo","notes","est_1rm","volume","xp"
-]
-
-def load_csv(path: str, cols: List[str]) -> pd.DataFrame:
-    if os.path.exists(path):
-        df = pd.read_csv(path)
-        for c in cols:
-            if c not in df.columns:
-                df[c] = None
-        return df
-    return pd.DataFrame(columns=cols)
-
-
-def save_csv(df: pd.DataFrame, path: str):
-    df.to_csv(path, index=False)
-
 # --- Supabase helpers ---
+# One client per process, shared by every session and fetch thread; requests
+# give up after FETCH_TIMEOUT instead of hanging the rerun. The supabase
+# package (optional: pip install supabase) is imported only when secrets
+# configure it, so local-only startups never pay for it. Configured but
+# unusable stops the app: falling back to local storage would lose every
+# save on a host with an ephemeral disk (Streamlit Cloud).
 @st.cache_resource(show_spinner=False)
 def supabase_client():
     url = st.secrets.get("SUPABASE_URL") if hasattr(st, "secrets") else None
     key = st.secrets.get("SUPABASE_KEY") if hasattr(st, "secrets") else None
-    if 'create_client' in globals() and create_client and url and key:
-        try:
-            return create_client(url, key)
-        except Exception:
-            return None
-    return None
+    if not (url and key): return None
+    from supabase import ClientOptions, create_client  # the sync client's options (storage, httpx_client, ...)
+    return create_client(url, key, options=ClientOptions(postgrest_client_timeout=FETCH_TIMEOUT))
 
-SUPA = supabase_client()
+try:
+    SUPA = supabase_client()  # a failure isn't cached, so the next rerun tries again
+except Exception as e:
+    st.error(f"Supabase is configured in Secrets but the client could not be created ({type(e).__name__}: {e}). "
+             "Fix the secrets or install the supabase package; nothing is saved until then.")
+    st.stop()
 USE_SUPABASE = SUPA is not None
-WORKOUT_TABLE = "workout_log"
-XP_TABLE = "xp_log"
 
-# --- Supabase helpers ---
-@st.cache_resource(show_spinner=False)
-def supabase_client():
-    url = st.secrets.get("SUPABASE_URL") if hasattr(st, "secrets") else None
-    key = st.secrets.get("SUPABASE_KEY") if hasattr(st, "secrets") else None
-    if 'create_client' in globals() and create_client and url and key:
-        try:
-            return create_client(url, key)
-        except Exception:
-            return None
-    return None
+# --- Local backend: "sqlite" (default) or "csv" (legacy whole-file layout) ---
+LOCAL_BACKEND = os.environ.get("WORKOUT_BACKEND", "sqlite").lower()
 
-SUPA = supabase_client()
-USE_SUPABASE = SUPA is not None
-WORKOUT_TABLE = "workout_log"
-XP_TABLE = "xp_log"
 
+# --- Current user: the signed-in account (st.login), else the athlete picked
+# in the sidebar. Every store is scoped to one user: Supabase filters on
+# user_id, local backends get their own partition files (see tracker/storage.py).
+def current_user() -> str:
+    if st.user.get("is_logged_in") and st.user.get("email"): return st.user.get("email")
+    name = st.sidebar.text_input("👤 Athlete", value=USER_DEFAULT, key="athlete").strip()
+    return name or USER_DEFAULT
 
-def epley_1rm(reps: float, weight: float) -> float:
-    try:
-        reps = float(reps); weight = float(weight)
-        return weight if reps <= 1 else weight * (1 + reps/30)
-    except: return 0.0
+USER = current_user()
+
+
+@st.cache_resource(show_spinner=False)
+def get_storage(user: str) -> Storage:
+    if USE_SUPABASE:
+        return SupabaseStorage(SUPA, user)
+    log_path, xp_path = partition_path(LOG_FILE, user), partition_path(XP_LOG_FILE, user)
+    if LOCAL_BACKEND == "csv":
+        return CsvStorage(log_path, xp_path)
+    db_path = partition_path(DB_FILE, user)
+    if not os.path.exists(db_path) and (os.path.exists(log_path) or os.path.exists(xp_path)):
+        migrate_csv_to_sqlite(log_path, xp_path, db_path)  # one-shot, first run only
+    return SqliteStorage(db_path)
+
+STORE = get_storage(USER)
+if TRACE.enabled:  # per-session proxy over the shared store
+    if getattr(st.session_state.get("traced_store"), "base", None) is not STORE:
+        st.session_state["traced_store"] = InstrumentedStorage(STORE, TRACE)
+    STORE = st.session_state["traced_store"]
+
+
+# Supabase writes go through a write-behind queue: batched, flushed off the
+# UI thread and journaled locally until they land.
+@st.cache_resource(show_spinner=False)
+def get_writer(user: str) -> Optional[WriteBehindQueue]:
+    return WriteBehindQueue(get_storage(user), partition_path(JOURNAL_FILE, user)) if USE_SUPABASE else None
+
+WRITER = get_writer(USER)
+
+# One cached copy of the log per session, shared by Log and Progress;
+# writes invalidate it and the next read fetches only the new rows.
+# Session aggregates for Progress and the latest-session index behind the
+# next-session targets ride along as snapshot subscribers.
+if "log_snapshot" not in st.session_state or st.session_state.get("snapshot_store") is not get_storage(USER):
+    st.session_state["log_snapshot"] = LogSnapshot(STORE)
+    st.session_state["session_aggs"] = SessionAggregates()
+    st.session_state["analytics"] = AnalyticsCache()
+    st.session_state["latest_sessions"] = LatestSessions()
+    st.session_state["log_snapshot"].subscribe(st.session_state["session_aggs"])
+    st.session_state["log_snapshot"].subscribe(st.session_state["latest_sessions"])
+    st.session_state["snapshot_store"] = get_storage(USER)
+    st.session_state["awarded_xp_keys"] = set()  # a different user: their awards are not ours
+    st.session_state["recent_page"] = 0
+SNAPSHOT: LogSnapshot = st.session_state["log_snapshot"]
+AGGS: SessionAggregates = st.session_state["session_aggs"]
+ANALYTICS: AnalyticsCache = st.session_state["analytics"]
+LATEST: LatestSessions = st.session_state["latest_sessions"]
+SNAPSHOT.storage = STORE  # plain or instrumented, following the Diagnostics toggle
+TRACE.watch("log snapshot", lambda: SNAPSHOT.frame)
+TRACE.watch("progress aggregates", lambda: list(AGGS.sessions.values()) + list(AGGS.best.values()))
+TRACE.watch("latest sessions", lambda: list(LATEST.rows.values()))
+TRACE.watch("analytics", lambda: ANALYTICS.value.frames() if ANALYTICS.value else None)
+if WRITER and st.session_state.get("seen_flushes") != WRITER.flushes:
+    st.session_state["seen_flushes"] = WRITER.flushes  # queued rows have landed since last rerun
+    SNAPSHOT.invalidate()
+
+# Training plan: compiled once and shared; an edited plan file is picked up
+# on the next rerun (one stat() per rerun). A broken file keeps the app on
+# the built-in program and says why.
+@st.cache_resource(show_spinner=False)
+def get_plans() -> PlanRegistry:
+    return PlanRegistry()
+
+try:
+    PLAN = get_plans().get(PLAN_FILE)
+except (OSError, PlanError) as e:
+    st.error(f"Plan file not loaded, using the built-in program: {e}")
+    PLAN = get_plans().get(None)
+
+# The rerun's independent reads (XP total, Recent Entries page, log delta)
+# start together on a bounded pool shared by all sessions; each section
+# then waits, up to FETCH_TIMEOUT, only for its own result.
+@st.cache_resource(show_spinner=False)
+def get_fetch_pool():
+    return fetch_pool()
+
+PREFETCH = Prefetch(get_fetch_pool(), FETCH_TIMEOUT)
+PREFETCH.start("total_xp", STORE.total_xp)
+PREFETCH.start("recent", STORE.recent_sets, RECENT_PAGE_SIZE + 1, st.session_state.get("recent_page", 0) * RECENT_PAGE_SIZE)
+SNAPSHOT.prefetch(get_fetch_pool())
 
 
 def todays_week_number() -> int:
@@ -230,188 +207,387 @@ def todays_week_number() -> int:
 # ──────────────────────────────────────────────────────────────
 
 def total_xp() -> int:
-    if USE_SUPABASE:
-        try:
-            res = SUPA.table(XP_TABLE).select("xp").execute()
-            return int(sum([r.get("xp", 0) for r in (res.data or [])]))
-        except Exception:
-            pass
-    df = load_csv(XP_LOG_FILE, ["date","task","xp"])
-    return int(df["xp"].sum()) if not df.empty else 0
+    # stored total first: a batch landing in between then briefly undercounts
+    # rather than counting the same award twice
+    try:
+        stored = st.session_state["last_total_xp"] = PREFETCH.result("total_xp", STORE.total_xp)
+    except Exception:
+        stored = st.session_state.get("last_total_xp", 0)  # slow or unreachable backend: last known total
+    return stored + (WRITER.pending_xp() if WRITER else 0)
+
+
+def xp_event_key(day: str, exercise: str, source: str, date: dt.date = None) -> str:
+    return "|".join([str(date or dt.date.today()), day, exercise, source])
 
 
-def award_xp(task: str, xp_amount: int):
-    df = load_csv(XP_LOG_FILE, ["date","task","xp"])
-    row = {"date": str(dt.date.today()), "task": task, "xp": int(xp_amount)}
-    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    save_csv(df, XP_LOG_FILE)
+def xp_row(task: str, xp_amount: int, event_key: str) -> Dict:
+    return {"date": str(dt.date.today()), "task": task, "xp": int(xp_amount), "event_key": event_key}
+
+
+def award_xp(task: str, xp_amount: int, event_key: str) -> bool:
+    """Award XP once per event_key. Keys already awarded this session skip all I/O."""
+    seen = st.session_state.setdefault("awarded_xp_keys", set())
+    if event_key in seen:
+        return False
+    row = xp_row(task, xp_amount, event_key)
+    if WRITER:
+        WRITER.submit(xp=row); added = True
+    else:
+        added = STORE.append_xp(row)
+    seen.add(event_key)
+    return added
 
 
 def current_level_and_progress() -> Tuple[int,int,int]:
     xp = total_xp()
-    level = 0
-    for lv, need in LEVEL_THRESHOLDS:
-        if xp >= need: level = lv
-    cur_need = next((need for lv,need in LEVEL_THRESHOLDS if lv==level), 0)
-    next_need = next((need for lv,need in LEVEL_THRESHOLDS if lv==level+1), cur_need)
-    progress = 0 if next_need==cur_need else int( (xp-cur_need) / (next_need-cur_need) * 100 )
+    level, progress = level_and_progress(xp)
     return level, xp, progress
 
 
+@st.cache_data(show_spinner=False)
+def avatar_b64(path: str, mtime: float) -> str:
+    # mtime is part of the cache key so a replaced image is re-encoded
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+@st.fragment
+@TRACE.traced("Avatar")
 def avatar_display(level:int):
     key,title = AVATARS.get(level, ("rookie","Rookie"))
     local_path = os.path.join(AVATAR_FOLDER, f"{key}.png")
     st.markdown("<a name='avatar'></a>", unsafe_allow_html=True)
     st.header("🧟 Your Training Avatar")
     if os.path.exists(local_path):
-        with open(local_path, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode()
-            st.markdown(f"<div style='text-align:center'><img src='data:image/png;base64,{encoded}' width='260' style='border-radius:16px;border:5px solid #8b5e3c;box-shadow:0 10px 25px rgba(0,0,0,0.25)'/><p style='font-size:22px;font-weight:700;color:#2f3b2f'>{title}</p></div>", unsafe_allow_html=True)
+        encoded = avatar_b64(local_path, os.path.getmtime(local_path))
+        st.markdown(f"<div style='text-align:center'><img src='data:image/png;base64,{encoded}' width='260' style='border-radius:16px;border:5px solid #8b5e3c;box-shadow:0 10px 25px rgba(0,0,0,0.25)'/><p style='font-size:22px;font-weight:700;color:#2f3b2f'>{title}</p></div>", unsafe_allow_html=True)
     else:
         st.markdown(f"<div class='card' style='text-align:center'>🥇 <b>{title}</b> — drop an image in ./avatars/{key}.png to customize.</div>", unsafe_allow_html=True)
 
 # XP header
-level, totalxp, pct = current_level_and_progress()
-st.markdown(f"### ⭐ Level {level} | Total XP: {totalxp}")
-st.markdown(f"""
+with TRACE.section("XP header"):
+    level, totalxp, pct = current_level_and_progress()
+    st.markdown(f"### ⭐ Level {level} | Total XP: {totalxp}")
+    st.markdown(f"""
 <div class='xp-bar'><div class='xp-fill' style='width:{pct}%'>{pct}%</div></div>
 """, unsafe_allow_html=True)
 
+# ──────────────────────────────────────────────────────────────
+# PAGE SECTIONS — each is a fragment, so its widgets rerun only that section.
+# Writes that change what other sections show (save/undo) trigger a full rerun.
+# ──────────────────────────────────────────────────────────────
+def flash(slot: str, kind: str, msg: str):
+    """Queue a message to show after the full rerun a write triggers."""
+    st.session_state.setdefault(f"flash_{slot}", []).append((kind, msg))
+
+
+def show_flash(slot: str):
+    for kind, msg in st.session_state.pop(f"flash_{slot}", []):
+        getattr(st, kind)(msg)
+
+
+def log_frame() -> Optional[pd.DataFrame]:
+    """The session's log; the stale copy (or None) if the backend is slower than FETCH_TIMEOUT."""
+    with TRACE.section("Log load"):
+        try:
+            return SNAPSHOT.get(FETCH_TIMEOUT)
+        except FetchTimeout:
+            st.warning(f"{STORE.label} is slow to answer — " + ("showing the last loaded log." if SNAPSHOT.frame is not None else "try again shortly."))
+            return SNAPSHOT.frame
+
+
+def targets_for(day: str) -> pd.DataFrame:
+    """Next-session targets for every block of `day`, from the latest-session index."""
+    log_frame()  # brings LATEST up to date (a delta at most)
+    with TRACE.section("Targets"):
+        return next_targets(LATEST, PLAN, day)
+
+
+def target_text(t: pd.Series) -> str:
+    load = f"{t['weight']:g} × {t['reps']}" if pd.notna(t["weight"]) else f"? × {t['reps']}"
+    return f"Next: {load} — {t['note']}"
+
 # ──────────────────────────────────────────────────────────────
 # PLAN VIEW (select day -> see what to do; checkbox to award XP)
 # ──────────────────────────────────────────────────────────────
 st.markdown("<a name='plan'></a>", unsafe_allow_html=True)
 st.header("📋 Plan — Pick a Training Day")
 
-all_days = list(SPLIT.keys())
-sel_day = st.selectbox("Choose workout", all_days)
-
-plan_cols = st.columns(2)
-with plan_cols[0]:
-    st.subheader(sel_day)
-    for block in SPLIT[sel_day]:
-        rep = block.get("reps")
-        rep_str = f"{rep[0]}–{rep[1]} reps" if rep else f"{block.get('duration','—')} sec/steps"
-        icon = block.get("icon", "•")
-        tip = block.get("tip", "")
-        st.markdown(f"<div class='card'> {icon} <b>{block['exercise']}</b> — {block['sets']} × {rep_str}<br><span style='opacity:.8'>{tip}</span></div>", unsafe_allow_html=True)
-
-with plan_cols[1]:
-    st.subheader("Quick XP check-off ✅")
-    st.caption("Tick what you completed today to add XP (you can still log detailed sets on the Log page).")
-    for block in SPLIT[sel_day]:
-        done = st.checkbox(f"{block.get('icon','•')} {block['exercise']}", key=f"xp_{sel_day}_{block['exercise']}")
-        if done:
-            gained = XP.get(block["category"], 6)
-            award_xp(block['exercise'], gained)
-            st.success(f"+{gained} XP — {block['exercise']}")
+if PLAN.source != "built-in": st.caption(f"Plan loaded from {PLAN.source}")
+if PLAN.warnings:
+    with st.expander(f"⚠️ Plan notes ({len(PLAN.warnings)})"):
+        for w in PLAN.warnings: st.caption(w)
+
+all_days = PLAN.day_names
+all_exercises = PLAN.exercises
+sel_day = st.selectbox("Choose workout", all_days)  # full rerun: the Log section defaults to this day
+
+
+@st.fragment
+@TRACE.traced("Plan")
+def plan_section(sel_day: str):
+    plan_cols = st.columns(2)
+    targets = targets_for(sel_day)
+    with plan_cols[0]:
+        st.subheader(sel_day)
+        for block in PLAN.days[sel_day]:
+            rep = block.get("reps")
+            rep_str = f"{rep[0]}–{rep[1]} reps" if rep else f"{block.get('duration','—')} sec/steps"
+            icon = block.get("icon", "•")
+            tip = block.get("tip", "")
+            nxt = f"<br>🎯 {target_text(targets.loc[block['exercise']])}" if block["exercise"] in targets.index else ""
+            st.markdown(f"<div class='card'> {icon} <b>{block['exercise']}</b> — {block['sets']} × {rep_str}<br><span style='opacity:.8'>{tip}</span>{nxt}</div>", unsafe_allow_html=True)
+
+    with plan_cols[1]:
+        st.subheader("Quick XP check-off ✅")
+        st.caption("Tick what you completed today to add XP (you can still log detailed sets on the Log page).")
+        for block in PLAN.days[sel_day]:
+            done = st.checkbox(f"{block.get('icon','•')} {block['exercise']}", key=f"xp_{sel_day}_{block['exercise']}")
+            if done:
+                gained = block["xp"]
+                award_xp(block['exercise'], gained, xp_event_key(sel_day, block['exercise'], "checkoff"))
+                st.success(f"+{gained} XP — {block['exercise']}")
+
+plan_section(sel_day)
 
 # ──────────────────────────────────────────────────────────────
 # LOG PAGE (detailed logging w/ est 1RM & volume)
 # ──────────────────────────────────────────────────────────────
 st.markdown("<a name='log'></a>", unsafe_allow_html=True)
 st.header("📝 Log Workout (sets/reps/weight/RIR)")
-log_df = (pd.DataFrame(SUPA.table(WORKOUT_TABLE).select("*").order("id").execute().data) if USE_SUPABASE else load_csv(LOG_FILE, DEFAULT_LOG_COLUMNS))
-
-log_day = st.selectbox("Training day", all_days, index=all_days.index(sel_day))
-exercises = [x["exercise"] for x in SPLIT[log_day]]
-log_ex = st.selectbox("Exercise", exercises)
-# show target
-rng = next((x.get("reps") for x in SPLIT[log_day] if x["exercise"]==log_ex), None)
-if rng: st.info(f"Target: {rng[0]}–{rng[1]} reps (double progression)")
-else: st.info("Time/steps based — log duration in notes.")
-
-col1,col2,col3 = st.columns(3)
-with col1: date = st.date_input("Date", value=dt.date.today())
-with col2: week = st.number_input("Week #", min_value=1, value=todays_week_number(), step=1)
-with col3: num_sets = st.number_input("How many sets?", 1, 10, 3)
-
-new_rows = []
-for s in range(1, num_sets+1):
-    with st.expander(f"Set {s}"):
-        reps = st.number_input("Reps", 0, 100, 0, key=f"reps_{s}")
-        weight = st.number_input("Weight", 0.0, 2000.0, 0.0, step=2.5, key=f"wt_{s}")
-        rir = st.number_input("RIR", 0.0, 10.0, 2.0, step=0.5, key=f"rir_{s}")
-        tempo = st.text_input("Tempo (e.g., 3-0-1)", key=f"tempo_{s}")
-        notes = st.text_input("Notes", key=f"notes_{s}")
-        est = round(epley_1rm(reps, weight),2)
-        vol = (weight or 0)*(reps or 0)
-        cat = next((x['category'] for x in SPLIT[log_day] if x['exercise']==log_ex), 'compound')
-        set_xp = XP.get(cat, 6)
-        st.caption(f"Est 1RM: {est} • Volume: {vol} • XP on save: +{set_xp}")
-        new_rows.append({"date":str(date),"week":week,"day_name":log_day,"exercise":log_ex,
-                         "set_number":s,"reps":reps,"weight":weight,"rir":rir,"tempo":tempo,
-                         "notes":notes,"est_1rm":est,"volume":vol,"xp":set_xp})
-
-if st.button("✅ Save Sets"):
-    if new_rows:
-        if USE_SUPABASE:
-            try:
-                SUPA.table(WORKOUT_TABLE).insert(new_rows).execute()
-                log_df = pd.DataFrame(SUPA.table(WORKOUT_TABLE).select("*").order("id").execute().data)
-            except Exception as e:
-                st.error(f"Supabase insert failed: {e}")
-        else:
-            log_df = pd.concat([log_df, pd.DataFrame(new_rows)], ignore_index=True)
-            save_csv(log_df, LOG_FILE)
-        # award XP total for these sets
-        total_award = sum(r["xp"] for r in new_rows)
-        award_xp(f"{log_ex} sets", total_award)
-        st.success(f"Saved {len(new_rows)} set(s). Awarded +{total_award} XP.")
-
-st.subheader("Recent Entries")
-st.dataframe(log_df.tail(20), use_container_width=True)
-cols_dl = st.columns(2)
-with cols_dl[0]:
-    if st.button("↩️ Undo Last Entry"):
-        if not log_df.empty:
-            if USE_SUPABASE and "id" in log_df.columns:
+
+
+@st.fragment
+@TRACE.traced("Log entry")
+def log_entry_section(default_day: str):
+    show_flash("log")
+    log_day = st.selectbox("Training day", all_days, index=all_days.index(default_day))
+    exercises = PLAN.by_day[log_day]
+    log_ex = st.selectbox("Exercise", exercises)
+    # show target
+    rng = PLAN.target(log_day, log_ex)
+    if rng:
+        t = targets_for(log_day).loc[log_ex]  # rep-ranged blocks always have a row
+        st.info(f"Target: {rng[0]}–{rng[1]} reps (double progression) • Last: {t['last']}\n\n{target_text(t)}")
+    else: st.info("Time/steps based — log duration in notes.")
+
+    col1,col2,col3 = st.columns(3)
+    with col1: date = st.date_input("Date", value=dt.date.today())
+    with col2: week = st.number_input("Week #", min_value=1, value=todays_week_number(), step=1)
+    with col3: num_sets = st.number_input("How many sets?", 1, 10, 3)
+
+    # one XP event per successful Save; a fresh id is drawn after each
+    batch_id = st.session_state.setdefault("save_batch_id", uuid.uuid4().hex)
+    set_xp = PLAN.xp(log_day, log_ex)
+    new_rows = []
+    for s in range(1, num_sets+1):
+        with st.expander(f"Set {s}"):
+            reps = st.number_input("Reps", 0, 100, 0, key=f"reps_{s}")
+            weight = st.number_input("Weight", 0.0, 2000.0, 0.0, step=2.5, key=f"wt_{s}")
+            rir = st.number_input("RIR", 0.0, 10.0, 2.0, step=0.5, key=f"rir_{s}")
+            tempo = st.text_input("Tempo (e.g., 3-0-1)", key=f"tempo_{s}")
+            notes = st.text_input("Notes", key=f"notes_{s}")
+            est = float(estimate_1rm(reps, weight, rir, ONE_RM_FORMULA)[0])
+            vol = float(volume(reps, weight)[0])
+            st.caption(f"Est 1RM: {est} • Volume: {vol} • XP on save: +{set_xp}")
+            new_rows.append({"date":str(date),"week":week,"day_name":log_day,"exercise":log_ex,
+                             "set_number":s,"reps":reps,"weight":weight,"rir":rir,"tempo":tempo,
+                             "notes":notes,"est_1rm":est,"volume":vol,"xp":set_xp})
+
+    if st.button("✅ Save Sets") and new_rows:
+        with TRACE.section("Save"):
+            # sets and their XP award go out together
+            total_award = sum(r["xp"] for r in new_rows)
+            award = xp_row(f"{log_ex} sets", total_award, xp_event_key(log_day, log_ex, f"sets:{batch_id}", date))
+            if WRITER:
+                WRITER.submit(new_rows, award)
+                verb = "Queued"
+            else:
                 try:
-                    last_id = int(log_df.iloc[-1]["id"])  # assumes serial id in Supabase
-                    SUPA.table(WORKOUT_TABLE).delete().eq("id", last_id).execute()
-                    log_df = pd.DataFrame(SUPA.table(WORKOUT_TABLE).select("*").order("id").execute().data)
-                    st.warning("Removed last entry from Supabase.")
+                    STORE.write_batch(new_rows, [award])
                 except Exception as e:
-                    st.error(f"Failed to delete from Supabase: {e}")
-            else:
-                save_csv(log_df.iloc[:-1], LOG_FILE)
-                st.warning("Removed last entry from CSV (XP not auto-removed).")
-        else:
+                    st.error(f"{STORE.label} insert failed: {e}")
+                    return
+                SNAPSHOT.invalidate()
+                verb = "Saved"
+            st.session_state.setdefault("awarded_xp_keys", set()).add(award["event_key"])
+            del st.session_state["save_batch_id"]
+            st.session_state["recent_page"] = 0  # show the new sets
+            flash("log", "success", f"{verb} {len(new_rows)} set(s). Awarded +{total_award} XP.")
+            st.rerun()  # header XP, Recent Entries and Progress all change
+
+    if WRITER:
+        depth, last = WRITER.depth(), WRITER.last_flush_ms
+        status = f"☁️ Write queue: {depth} pending • last flush " + (f"{last:.0f} ms" if last is not None else "—")
+        if WRITER.last_error: status += f" • retrying ({WRITER.last_error})"
+        if WRITER.rejected: status += f" • {WRITER.rejected} save(s) rejected, kept in {os.path.basename(WRITER.rejected_path)}"
+        st.caption(status)
+
+
+def turn_recent_page(step: int):
+    st.session_state["recent_page"] = max(st.session_state.get("recent_page", 0) + step, 0)
+
+
+def undo_last_entry():
+    if WRITER and WRITER.depth():  # the last entry may still be queued
+        landed = WRITER.flush(timeout=5.0)
+        SNAPSHOT.invalidate()
+        if not landed:  # the newest stored set is not the one just saved
+            st.warning(f"{WRITER.depth()} save(s) still on their way to {STORE.label} — Undo once they land.")
+            return
+    try:
+        last_id = STORE.last_set_id()
+        if last_id is None:
             st.info("Log is empty.")
-with cols_dl[1]:
-    if not log_df.empty:
-        st.download_button("⬇️ Download full CSV", data=log_df.to_csv(index=False), file_name="workout_log_export.csv", mime="text/csv")
+            return
+        if not STORE.delete_set(last_id):  # gone already, e.g. removed from another session
+            SNAPSHOT.invalidate()
+            st.warning(f"Entry #{last_id} was no longer in {STORE.label}; nothing removed.")
+            return
+        SNAPSHOT.discard(last_id)
+    except Exception as e:
+        st.error(f"Failed to delete from {STORE.label}: {e}")
+        return
+    flash("recent", "warning", f"Removed last entry from {STORE.label} (XP not auto-removed).")
+    st.rerun()
+
+
+@st.fragment
+@TRACE.traced("Recent Entries")
+def recent_entries_section():
+    st.subheader("Recent Entries")
+    show_flash("recent")
+    # one bounded page per render (id DESC LIMIT n OFFSET k); one extra row tells whether there is an older page
+    page = st.session_state.setdefault("recent_page", 0)
+    try:
+        rows = PREFETCH.result("recent", STORE.recent_sets, RECENT_PAGE_SIZE + 1, page * RECENT_PAGE_SIZE)
+    except FetchTimeout:
+        st.warning(f"{STORE.label} is slow to answer — recent entries will show on the next rerun.")
+        return
+    has_older, rows = len(rows) > RECENT_PAGE_SIZE, rows.head(RECENT_PAGE_SIZE)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    nav = st.columns([1, 1, 4])
+    nav[0].button("◀ Newer", disabled=page == 0, on_click=turn_recent_page, args=(-1,))
+    nav[1].button("Older ▶", disabled=not has_older, on_click=turn_recent_page, args=(1,))
+    nav[2].caption(f"Page {page + 1} • newest first")
+
+    cols_dl = st.columns(2)
+    with cols_dl[0]:
+        if st.button("↩️ Undo Last Entry"): undo_last_entry()
+    with cols_dl[1]:
+        with st.popover("⬇️ Export CSV"):
+            ex = st.selectbox("Exercise", ["All"] + all_exercises, key="export_ex")
+            start = st.date_input("From", value=None, key="export_from")
+            end = st.date_input("To", value=None, key="export_to")
+            gz = st.checkbox("gzip", key="export_gz")
+            # generated only when clicked, streamed from storage in chunks
+            store = get_storage(USER)  # the plain store: this runs on a download thread, outside any traced run
+            def export() -> io.BytesIO:
+                buf = io.BytesIO()
+                write_csv_export(store, buf, None if ex == "All" else ex, start, end, compress=gz)
+                buf.seek(0)
+                return buf
+            st.download_button("Download", data=export, mime="application/gzip" if gz else "text/csv",
+                               file_name="workout_log_export.csv" + (".gz" if gz else ""))
+
+
+@st.fragment
+@TRACE.traced("Import")
+def import_section():
+    with st.expander("📥 Import history (CSV / JSON / JSON Lines)"):
+        show_flash("import")
+        st.caption("Exports from other trackers or an earlier workout_log_export.csv. Common column names are "
+                   "recognised; est. 1RM, volume and XP are recomputed. A failed import resumes when the same file is imported again.")
+        up = st.file_uploader("File", type=["csv", "json", "jsonl", "ndjson", "gz"], key="import_file")
+        mode = st.radio("Sets already logged (same date, exercise and set #)", ["skip", "update"], horizontal=True, key="import_mode")
+        award = st.checkbox("Award XP for imported sets", value=True, key="import_xp")
+        if up is None or not st.button("Import", key="import_go"): return
+        if WRITER and not WRITER.flush():  # queued saves land first, so dedup sees them
+            st.warning(f"{WRITER.depth()} save(s) still on their way to {STORE.label} — import once they land.")
+            return
+        bar = st.progress(0.0, text="Starting…")
+        def report(s: Dict):
+            bar.progress(s["fraction"], text=f"{s['rows']} read • {s['inserted']} new • {s['updated']} updated • {s['duplicates']} duplicate")
+        try:
+            stats = import_log(get_storage(USER), up, name=up.name, plan=PLAN, formula=ONE_RM_FORMULA, on_duplicate=mode,
+                               award_xp=award, checkpoint=partition_path(f"import_{user_slug(up.name)}_{up.size}.json", USER),
+                               progress=report)
+        except Exception as e:
+            st.error(f"Import stopped: {e}")
+            return
+        SNAPSHOT.reset()  # updates rewrite history, which deltas don't see: reload in full
+        st.session_state["recent_page"] = 0
+        flash("import", "success", f"Imported {stats['inserted']} set(s), updated {stats['updated']}, skipped "
+                                   f"{stats['duplicates']} duplicate(s) and {stats['invalid']} invalid row(s). +{stats['xp']} XP.")
+        st.rerun()
+
+
+log_entry_section(sel_day)
+recent_entries_section()
+import_section()
 
 # ──────────────────────────────────────────────────────────────
 # PROGRESS (charts + PRs + targets)
 # ──────────────────────────────────────────────────────────────
 st.markdown("<a name='progress'></a>", unsafe_allow_html=True)
 st.header("📊 Progress & PRs")
-prog = (pd.DataFrame(SUPA.table(WORKOUT_TABLE).select("*").order("id").execute().data) if USE_SUPABASE else load_csv(LOG_FILE, DEFAULT_LOG_COLUMNS))
-if prog.empty:
-    st.info("No data yet — log a session above.")
-else:
+
+
+@st.fragment
+@TRACE.traced("Progress")
+def progress_section():
+    frame = log_frame()  # also brings AGGS up to date
+    if frame is None: return
+    if frame.empty:
+        st.info("No data yet — log a session above.")
+        return
     c1,c2 = st.columns(2)
     with c1:
-        exs = sorted(prog["exercise"].dropna().unique())
-        ex = st.selectbox("Exercise", exs)
+        ex = st.selectbox("Exercise", AGGS.exercises())
     with c2:
-        metric = st.selectbox("Metric", ["weight","reps","volume","est_1rm"]) 
-
-    ex_df = prog[prog["exercise"]==ex].copy()
-    ex_df["session"] = pd.to_datetime(ex_df["date"]).dt.date
-    if metric == "volume":
-        series = ex_df.groupby("session")["volume"].sum()
-    elif metric == "est_1rm":
-        series = ex_df.groupby("session")["est_1rm"].max()
-    else:
-        series = ex_df.groupby("session")[metric].mean()
-    st.line_chart(series)
+        metric = st.selectbox("Metric", METRICS)
+
+    st.line_chart(AGGS.series(ex, metric))
 
     st.markdown("### Best Sets (last 90 days)")
-    recent = ex_df[pd.to_datetime(ex_df["date"]) >= (pd.Timestamp.today() - pd.Timedelta(days=90))]
-    best = recent.sort_values(["est_1rm","volume"], ascending=False).head(10)
-    st.dataframe(best[["date","exercise","reps","weight","est_1rm","volume","notes"]])
+    st.dataframe(AGGS.best_sets(ex, since=dt.date.today() - dt.timedelta(days=89)))
+
+progress_section()
+
+# ──────────────────────────────────────────────────────────────
+# ANALYTICS (every exercise at once; rebuilt only when the log version changes)
+# ──────────────────────────────────────────────────────────────
+st.markdown("<a name='analytics'></a>", unsafe_allow_html=True)
+st.header("📈 Analytics")
+
+
+@st.fragment
+@TRACE.traced("Analytics")
+def analytics_section():
+    frame = log_frame()
+    if frame is None or frame.empty:
+        st.info("Analytics appear once sets are logged.")
+        return
+    a = ANALYTICS.get(frame, SNAPSHOT.version, PLAN, dt.date.today())
+    c1, c2, c3 = st.columns(3)
+    period = c1.radio("Rollup", PERIODS, horizontal=True, key="an_period")
+    by = c2.radio("Group by", list(GROUPINGS), horizontal=True, key="an_by")
+    measure = c3.selectbox("Measure", MEASURES, key="an_measure")
+    r = a.rollup(period, by)
+    st.bar_chart(r.pivot(index="period", columns="group", values=measure))
+
+    t1, t2 = st.columns(2)
+    with t1:
+        st.markdown(f"### PRs (last {TREND_DAYS} days)")
+        prs = a.recent_prs()
+        if prs.empty: st.caption("No PRs in this window yet.")
+        else: st.dataframe(prs, hide_index=True, use_container_width=True)
+    with t2:
+        st.markdown(f"### Est. 1RM trend (per week, last {TREND_DAYS} days)")
+        if a.trends.empty: st.caption("Trends need 3+ sessions of an exercise in this window.")
+        else: st.dataframe(a.trends, hide_index=True, use_container_width=True)
+
+analytics_section()
 
 # ──────────────────────────────────────────────────────────────
 # AVATAR SECTION
@@ -422,13 +598,8 @@ avatar_display(level)
 # TEMPLATE EXPORT
 # ──────────────────────────────────────────────────────────────
 if st.button("⬇️ Export Weekly Template CSV"):
-    rows = []
-    for day, items in SPLIT.items():
-        for it in items:
-            r = it.get("reps"); rep_str = "time" if r is None else f"{r[0]}-{r[1]}"
-            rows.append({"day":day,"exercise":it["exercise"],"sets":it["sets"],"reps":rep_str,"category":it["category"]})
-    pd.DataFrame(rows).to_csv(TEMPLATE_FILE, index=False)
-    st.success(f"Saved {TEMPLATE_FILE} in this folder.")
+    plan_rows(PLAN.days).to_csv(TEMPLATE_FILE, index=False)
+    st.success(f"Saved {TEMPLATE_FILE} in this folder (load it with WORKOUT_PLAN_FILE={TEMPLATE_FILE}).")
 
 # ──────────────────────────────────────────────────────────────
 # CLOUD STORAGE INFO / FOOTER — bulletproof no-quote version
@@ -446,37 +617,32 @@ if USE_SUPABASE:
         """
     )
 
-    st.code(
-        """create table if not exists workout_log (
-  id bigserial primary key,
-  date text,
-  week int,
-  day_name text,
-  exercise text,
-  set_number int,
-  reps int,
-  weight float8,
-  rir float8,
-  tempo text,
-  notes text,
-  est_1rm float8,
-  volume float8,
-  xp int
-);
-
-create table if not exists xp_log (
-  id bigserial primary key,
-  date text,
-  task text,
-  xp int
-);
-""",
-        language="sql",
-    )
+    st.code(SUPABASE_SCHEMA, language="sql")
 
 else:
     st.warning(
-        "💾 Using local CSV files (no cloud). On Streamlit Cloud these may reset — "
+        f"💾 Using local {STORE.label} storage (no cloud). On Streamlit Cloud this may reset — "
         "use Download, or configure Supabase in Secrets to enable cloud sync."
     )
 
+# ──────────────────────────────────────────────────────────────
+# DIAGNOSTICS PANEL (sidebar; the run is closed first so it reports itself)
+# ──────────────────────────────────────────────────────────────
+PREFETCH.close()
+TRACE.end()
+if TRACE.enabled and TRACE.last_full():
+    run = TRACE.last_full()
+    with st.sidebar.expander("🔬 Hot paths — last full run", expanded=True):
+        st.caption(f"{run['ms']:.0f} ms • {len(run['calls'])} storage calls • {run['trips']} round trips")
+        st.markdown("**Sections** (inclusive of nested ones)")
+        st.dataframe(pd.DataFrame(run["sections"]).set_index("name"), use_container_width=True)
+        if run["calls"]:
+            st.markdown("**Storage calls**")
+            st.dataframe(pd.DataFrame(run["calls"]), use_container_width=True, hide_index=True)
+        st.markdown("**DataFrame memory**")
+        for name, size in run["memory"].items():
+            st.caption(f"{name}: {size / 2**20:.1f} MB")
+    with st.sidebar.expander("🕑 Recent runs"):
+        st.caption("Fragment-only reruns show up here on the next full run.")
+        st.dataframe(TRACE.history(), use_container_width=True, hide_index=True)
+        if TRACE_FILE: st.caption(f"Appending every run to {TRACE_FILE}")
@@ -0,0 +1,234 @@
+"""Headless benchmarks for every per-rerun hot path, on synthetic histories.
+
+    python benchmarks/bench.py [--sizes 10k,100k,1M] [--backends csv,sqlite]
+                               [--repeat 5] [--latency 0] [--out bench_report.json] [--compare old.json]
+
+For each backend and history size a scratch store is filled from
+synthetic.py, then each path is timed `--repeat` times:
+
+  load_log          full log load (load_csv for the CSV backend)
+  snapshot_delta    LogSnapshot refresh after a 3-set append (checked against a full load)
+  level_header      total_xp() + level_and_progress()
+  award_xp          one keyed XP award
+  save_sets         3-set Save (write_batch with its XP award)
+  undo              last_set_id() + delete_set()
+  progress_build    SessionAggregates built from the full log
+  progress_lookup   chart series for every metric + Best Sets, one exercise
+  progress_legacy   the old per-rerun groupby + sort, for reference
+  analytics_build   dashboard tables (all rollups, PR events, trend slopes) for every exercise
+  analytics_cached  the same dashboard on a rerun with an unchanged log version
+  analytics_legacy  the per-exercise groupby loop the dashboard replaces, for reference
+  targets_index     latest-session index (tracker/recommend.py) built from the full log
+  targets_day       next-session targets for every block of one training day
+  recent_page       one Recent Entries page (newest 21 rows)
+  csv_export        full-log CSV export, streamed from storage in chunks
+  page_reads_serial     a rerun's reads after a write (XP total, Recent page, log delta), one by one
+  page_reads_concurrent the same reads started together on the fetch pool (tracker/prefetch.py)
+
+Results (median/min ms per path) go to a JSON report; --compare prints the
+ratio against an earlier report so storage or caching changes can be
+judged run to run. The fake-supabase backend uses benchmarks/fake_supabase.py;
+--latency adds that many ms to each of its requests (after the fill), which
+is what the page_reads_* pair is meant to be read against.
+"""
+import argparse
+import datetime as dt
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, HERE]
+
+from synthetic import SIZES, synthetic_log, synthetic_xp  # noqa: E402
+from tracker.aggregates import METRICS, SessionAggregates  # noqa: E402
+from tracker.analytics import GROUPINGS, PERIODS, AnalyticsCache  # noqa: E402
+from tracker.plans import PlanRegistry  # noqa: E402
+from tracker.recommend import LatestSessions, next_targets  # noqa: E402
+from tracker.program import level_and_progress  # noqa: E402
+from tracker.prefetch import Prefetch, fetch_pool  # noqa: E402
+from tracker.snapshot import LogSnapshot  # noqa: E402
+from tracker.storage import (DEFAULT_LOG_COLUMNS, DEFAULT_USER, WORKOUT_TABLE, XP_COLUMNS, XP_TABLE, CsvStorage,  # noqa: E402
+                     SqliteStorage, Storage, SupabaseStorage, write_csv_export)
+
+
+def make_storage(backend: str, tmp: str, log: pd.DataFrame, xp: pd.DataFrame, latency: float = 0.0) -> Storage:
+    if backend == "csv":
+        log.to_csv(os.path.join(tmp, "workout_log.csv"), index=False)
+        xp.to_csv(os.path.join(tmp, "xp_log.csv"), index=False)
+        return CsvStorage(os.path.join(tmp, "workout_log.csv"), os.path.join(tmp, "xp_log.csv"))
+    if backend == "sqlite":
+        store = SqliteStorage(os.path.join(tmp, "workout.db"))
+        with store._conn() as con:
+            log[DEFAULT_LOG_COLUMNS].to_sql(WORKOUT_TABLE, con, if_exists="append", index=False)
+            xp[XP_COLUMNS].to_sql(XP_TABLE, con, if_exists="append", index=False)
+        return store
+    if backend == "fake-supabase":
+        from fake_supabase import FakeSupabase
+        client = FakeSupabase()
+        client._write(WORKOUT_TABLE, log.assign(user_id=DEFAULT_USER).to_dict("records"), False, None, False)
+        client._write(XP_TABLE, xp.assign(user_id=DEFAULT_USER).to_dict("records"), False, None, False)
+        client.latency = latency
+        return SupabaseStorage(client)
+    raise ValueError(f"unknown backend {backend!r}")
+
+
+def timed(fn: Callable, repeat: int, setup: Callable = None) -> List[float]:
+    out = []
+    for _ in range(repeat):
+        if setup: setup()
+        t0 = time.perf_counter(); fn(); out.append(time.perf_counter() - t0)
+    return out
+
+
+def new_sets(n: int = 3) -> List[Dict]:
+    today = str(dt.date.today())
+    return [{"date": today, "week": 1, "day_name": "Bench day", "exercise": "Dumbell Bench Press", "set_number": i,
+             "reps": 8, "weight": 60.0, "rir": 2.0, "tempo": "", "notes": "", "est_1rm": 76.0, "volume": 480.0, "xp": 12}
+            for i in range(1, n + 1)]
+
+
+def run_paths(store: Storage, repeat: int) -> Dict[str, List[float]]:
+    res: Dict[str, List[float]] = {}
+    counter = iter(range(10**9))
+
+    res["load_log"] = timed(store.load_log, repeat)
+
+    snap = LogSnapshot(store, max_age=None); snap.get()
+    res["snapshot_delta"] = timed(lambda: snap.get(), repeat,
+                                  setup=lambda: (store.append_sets(new_sets()), snap.invalidate()))
+    # new sets carry "" where the synthetic history has NULLs: the merge must still line up
+    if len(snap.get()) != len(store.load_log()):
+        raise RuntimeError(f"snapshot_delta: snapshot has {len(snap.frame)} rows, storage {len(store.load_log())}")
+
+    res["level_header"] = timed(lambda: level_and_progress(store.total_xp()), repeat)
+
+    def award():
+        store.append_xp({"date": str(dt.date.today()), "task": "bench", "xp": 10, "event_key": f"bench|{next(counter)}"})
+    res["award_xp"] = timed(award, repeat)
+
+    def save():
+        store.write_batch(new_sets(), [{"date": str(dt.date.today()), "task": "bench sets", "xp": 36,
+                                        "event_key": f"bench-save|{next(counter)}"}])
+    res["save_sets"] = timed(save, repeat)
+
+    res["undo"] = timed(lambda: store.delete_set(store.last_set_id()), repeat)
+
+    frame = store.load_log()
+    aggs = SessionAggregates()
+    res["progress_build"] = timed(lambda: aggs.on_reset(frame), repeat)
+    ex = frame["exercise"].value_counts().index[0]
+    since = dt.date.today() - dt.timedelta(days=89)
+    res["progress_lookup"] = timed(lambda: ([aggs.series(ex, m) for m in METRICS], aggs.best_sets(ex, since)), repeat)
+
+    def legacy():
+        ex_df = frame[frame["exercise"] == ex].copy()
+        ex_df["session"] = pd.to_datetime(ex_df["date"]).dt.date
+        ex_df.groupby("session")["est_1rm"].max()
+        recent = ex_df[pd.to_datetime(ex_df["date"]) >= (pd.Timestamp.today() - pd.Timedelta(days=90))]
+        recent.sort_values(["est_1rm", "volume"], ascending=False).head(10)
+    res["progress_legacy"] = timed(legacy, repeat)
+
+    plan, today = PlanRegistry().get(None), dt.date.today()
+    def dashboard(cache: AnalyticsCache, version: int):
+        a = cache.get(frame, version, plan, today)
+        for p in PERIODS:
+            for by in GROUPINGS: a.rollup(p, by)
+        a.recent_prs()
+    versions, warm = iter(range(10**9)), AnalyticsCache()
+    res["analytics_build"] = timed(lambda: dashboard(warm, next(versions)), repeat)
+    res["analytics_cached"] = timed(lambda: dashboard(warm, -1), repeat, setup=lambda: dashboard(warm, -1))
+
+    def analytics_legacy():
+        for ex_name in frame["exercise"].unique():
+            ex_df = frame[frame["exercise"] == ex_name].copy()
+            ex_df["session"] = pd.to_datetime(ex_df["date"]).dt.normalize()
+            s = ex_df.groupby("session")["est_1rm"].max()
+            s.cummax()
+            for p in ("W", "M"): ex_df.groupby(ex_df["session"].dt.to_period(p))["volume"].sum()
+    res["analytics_legacy"] = timed(analytics_legacy, repeat)
+
+    latest = LatestSessions()
+    res["targets_index"] = timed(lambda: latest.on_reset(frame), repeat)
+    res["targets_day"] = timed(lambda: next_targets(latest, plan, plan.day_names[0]), repeat)
+
+    res["recent_page"] = timed(lambda: store.recent_sets(21), repeat)
+    res["csv_export"] = timed(lambda: write_csv_export(store, io.BytesIO()), repeat)
+
+    pool = fetch_pool()
+    stale = lambda: (store.append_sets(new_sets()), snap.invalidate())
+    def page_serial():
+        store.total_xp(); store.recent_sets(21); snap.get()
+    def page_concurrent():
+        pre = Prefetch(pool)
+        pre.start("total_xp", store.total_xp); pre.start("recent", store.recent_sets, 21); snap.prefetch(pool)
+        pre.result("total_xp", store.total_xp); pre.result("recent", store.recent_sets, 21); snap.get()
+    res["page_reads_serial"] = timed(page_serial, repeat, setup=stale)
+    res["page_reads_concurrent"] = timed(page_concurrent, repeat, setup=stale)
+    pool.shutdown()
+    return res
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(report: Dict, old_path: str):
+    with open(old_path) as f:
+        old = {(r["backend"], r["size"], r["path"]): r["median_ms"] for r in json.load(f)["results"]}
+    print(f"\nvs {old_path}  (ratio < 1 is faster)")
+    for r in report["results"]:
+        prev = old.get((r["backend"], r["size"], r["path"]))
+        if prev:
+            print(f"  {r['backend']:<13} {r['size']:>5} {r['path']:<21} {prev:10.2f} -> {r['median_ms']:10.2f} ms  x{r['median_ms'] / prev:5.2f}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="10k,100k,1M", help=f"comma list of {', '.join(SIZES)} or plain integers")
+    ap.add_argument("--backends", default="csv,sqlite", help="comma list of csv, sqlite, fake-supabase")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.0, help="ms per fake-supabase request")
+    ap.add_argument("--out", default="bench_report.json")
+    ap.add_argument("--compare", help="earlier report to compare against")
+    args = ap.parse_args()
+
+    report = {"meta": {"git": git_rev(), "when": dt.datetime.now().isoformat(timespec="seconds"),
+                       "python": platform.python_version(), "pandas": pd.__version__,
+                       "platform": platform.platform(), "repeat": args.repeat, "latency_ms": args.latency},
+              "results": []}
+    for size in args.sizes.split(","):
+        n = SIZES.get(size) or int(size)
+        log = synthetic_log(n); xp = synthetic_xp(log)
+        for backend in args.backends.split(","):
+            with tempfile.TemporaryDirectory() as tmp:
+                store = make_storage(backend, tmp, log, xp, args.latency / 1000)
+                for path, runs in run_paths(store, args.repeat).items():
+                    ms = [r * 1000 for r in runs]
+                    row = {"backend": backend, "size": size, "rows": n, "path": path,
+                           "median_ms": round(statistics.median(ms), 3), "min_ms": round(min(ms), 3)}
+                    report["results"].append(row)
+                    print(f"{backend:<13} {size:>5} {path:<21} {row['median_ms']:10.2f} ms")
+                del store
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nreport written to {args.out}")
+    if args.compare: compare(report, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""In-memory stand-in for the supabase-py client, for headless checks.
+
+Covers the slice of the PostgREST query builder the app uses (select with
+an optional exact count, insert/upsert/delete, eq/gt/gte/lte/in_,
+order/limit/range, rpc("log_batch")) and mimics the schema's triggers:
+xp_summary keeps one total per user_id, (user_id, event_key) is unique in
+xp_log and (user_id, batch_id, set_number) in workout_log (rows without a
+batch_id never conflict, as with NULLs). `latency` adds a delay per request
+and `down = True` makes every request fail, to exercise slow or unreachable
+backends.
+"""
+import threading
+import time
+from typing import Dict, List
+
+
+class APIError(Exception):
+    def __init__(self, message: str, code: str = None):
+        super().__init__(message)
+        self.code = code  # SQLSTATE, as PostgREST reports it
+
+
+UNIQUE = {"xp_log": "user_id,event_key", "workout_log": "user_id,batch_id,set_number"}
+
+
+class _Response:
+    def __init__(self, data, count: int = None):
+        self.data, self.count = data, count
+
+
+class _Query:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client, self.table = client, table
+        self.op, self.payload, self.columns, self.count = "select", None, "*", None
+        self.filters, self.order_by, self.lim, self.offset = [], None, None, 0
+        self.on_conflict, self.ignore_duplicates = None, False
+
+    # --- verbs ---
+    def select(self, columns: str = "*", count: str = None):
+        self.op, self.columns, self.count = "select", columns, count; return self
+
+    def insert(self, rows):
+        self.op, self.payload = "insert", rows if isinstance(rows, list) else [rows]; return self
+
+    def upsert(self, rows, on_conflict: str = "id", ignore_duplicates: bool = False):
+        self.op, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates; return self
+
+    def delete(self):
+        self.op = "delete"; return self
+
+    # --- filters / modifiers ---
+    def _f(self, col, fn):
+        self.filters.append(lambda r: r.get(col) is not None and fn(r.get(col))); return self
+
+    def eq(self, col, v): return self._f(col, lambda x: x == v)
+    def gt(self, col, v): return self._f(col, lambda x: x > v)
+    def gte(self, col, v): return self._f(col, lambda x: x >= v)
+    def lte(self, col, v): return self._f(col, lambda x: x <= v)
+    def in_(self, col, vs): vs = set(vs); return self._f(col, lambda x: x in vs)
+
+    def order(self, col, desc: bool = False):
+        self.order_by = (col, desc); return self
+
+    def limit(self, n: int):
+        self.lim = n; return self
+
+    def range(self, start: int, end: int):
+        self.offset, self.lim = start, end - start + 1; return self
+
+    def execute(self) -> _Response:
+        return self.client._execute(self)
+
+
+class _Rpc:
+    def __init__(self, client, name, params):
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self) -> _Response:
+        return self.client._rpc(self.name, self.params)
+
+
+class FakeSupabase:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.down = False
+        self.calls = 0
+        self.tables: Dict[str, List[Dict]] = {"workout_log": [], "xp_log": [], "xp_summary": []}
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> _Query:
+        self.tables.setdefault(name, [])
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: Dict) -> _Rpc:
+        return _Rpc(self, name, params)
+
+    # --- server side ---
+    def _request(self):
+        self.calls += 1
+        if self.latency: time.sleep(self.latency)
+        if self.down: raise ConnectionError("fake supabase is down")
+
+    def _execute(self, q: _Query) -> _Response:
+        self._request()
+        with self._lock:
+            rows = self.tables[q.table]
+            if q.op in ("insert", "upsert"):
+                return _Response(self._write(q.table, q.payload, q.op == "upsert", q.on_conflict, q.ignore_duplicates))
+            hit = [r for r in rows if all(f(r) for f in q.filters)]
+            if q.op == "delete":
+                self.tables[q.table] = [r for r in rows if r not in hit]
+                if q.table == "xp_log":
+                    for r in hit: self._bump(r.get("user_id"), -(r.get("xp") or 0))
+                return _Response(hit)
+            if q.order_by:
+                col, desc = q.order_by
+                hit.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            total = len(hit) if q.count else None
+            hit = hit[q.offset:]
+            if q.lim is not None: hit = hit[:q.lim]
+            if q.columns != "*":
+                cols = [c.strip() for c in q.columns.split(",")]
+                hit = [{c: r.get(c) for c in cols} for r in hit]
+            return _Response([dict(r) for r in hit], total)
+
+    def _write(self, table, rows, upsert, on_conflict, ignore_duplicates) -> List[Dict]:
+        out = []
+        for row in rows:
+            key = on_conflict if upsert else UNIQUE.get(table)
+            cols = key.split(",") if key else []
+            existing = None
+            if cols and all(row.get(c) is not None for c in cols):
+                existing = next((r for r in self.tables[table] if all(r.get(c) == row[c] for c in cols)), None)
+            if existing is not None:
+                if not upsert: raise APIError(f"duplicate key value violates unique constraint on ({key})", code="23505")
+                if ignore_duplicates: continue
+                if table == "xp_log" and "xp" in row:
+                    self._bump(existing.get("user_id"), (row["xp"] or 0) - (existing.get("xp") or 0))
+                existing.update(row); out.append(dict(existing)); continue
+            new = dict(row)
+            if "id" not in new:
+                self._ids[table] = self._ids.get(table, 0) + 1
+                new["id"] = self._ids[table]
+            self.tables[table].append(new)
+            if table == "xp_log": self._bump(new.get("user_id"), new.get("xp") or 0)
+            out.append(dict(new))
+        return out
+
+    def _bump(self, user_id: str, delta: int):
+        summary = self.tables["xp_summary"]
+        row = next((r for r in summary if r["user_id"] == user_id), None)
+        if row is None:
+            row = {"user_id": user_id, "total": 0}; summary.append(row)
+        row["total"] += int(delta)
+
+    def _rpc(self, name: str, params: Dict) -> _Response:
+        self._request()
+        if name != "log_batch":
+            raise APIError(f"Could not find the function public.{name}")
+        with self._lock:
+            self._write("workout_log", params.get("sets") or [], True, UNIQUE["workout_log"], True)
+            self._write("xp_log", params.get("xp") or [], True, "user_id,event_key", True)
+        return _Response(None)
@@ -0,0 +1,100 @@
+"""Memory and query cost of the typed log layout vs pandas defaults.
+
+    python benchmarks/memory.py [--sizes 10k,100k,1M] [--out memory_report.json]
+
+For each size the synthetic log is loaded two ways:
+
+  csv     pd.read_csv defaults (the old load_csv)  vs  typed_log on top
+  json    DataFrame from JSON records (the old Supabase path)  vs  typed_log
+
+and for each layout it reports deep DataFrame memory, the tracemalloc peak
+of the load, and the median time of the Progress-style groupby (per
+exercise and session day) and of a filter (one exercise, last 90 days).
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(HERE), HERE]
+
+from synthetic import SIZES, synthetic_log  # noqa: E402
+from tracker.storage import typed_log  # noqa: E402
+
+
+def load_traced(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    df = fn()  # timed again untraced: tracemalloc slows allocation-heavy code several-fold
+    return df, time.perf_counter() - t0, peak
+
+
+def median_ms(fn, repeat: int = 5) -> float:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); out.append(time.perf_counter() - t0)
+    return round(statistics.median(out) * 1000, 2)
+
+
+def groupby(df: pd.DataFrame):
+    day = pd.to_datetime(df["date"]).dt.normalize()
+    return df.groupby([df["exercise"], day], observed=True).agg(volume=("volume", "sum"), est_1rm=("est_1rm", "max"))
+
+
+def filter_recent(df: pd.DataFrame, exercise: str):
+    since = pd.Timestamp(dt.date.today() - dt.timedelta(days=89))
+    return df[(df["exercise"] == exercise) & (pd.to_datetime(df["date"]) >= since)]
+
+
+def measure(name: str, load) -> dict:
+    df, secs, peak = load_traced(load)
+    ex = df["exercise"].value_counts().index[0]
+    return {"layout": name, "rows": len(df), "memory_mb": round(df.memory_usage(deep=True).sum() / 2**20, 2),
+            "load_peak_mb": round(peak / 2**20, 2), "load_ms": round(secs * 1000, 1),
+            "groupby_ms": median_ms(lambda: groupby(df)), "filter_ms": median_ms(lambda: filter_recent(df, ex))}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="10k,100k,1M")
+    ap.add_argument("--out", default="memory_report.json")
+    args = ap.parse_args()
+
+    results = []
+    for size in args.sizes.split(","):
+        log = synthetic_log(SIZES.get(size) or int(size))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "workout_log.csv")
+            log.to_csv(path, index=False)
+            records = json.loads(log.to_json(orient="records"))
+            rows = [
+                measure("csv default", lambda: pd.read_csv(path)),
+                measure("csv typed", lambda: typed_log(pd.read_csv(path))),
+                measure("json default", lambda: pd.DataFrame(records)),
+                measure("json typed", lambda: typed_log(pd.DataFrame(records))),
+            ]
+        for r in rows:
+            r["size"] = size
+            print(f"{size:>5} {r['layout']:<13} {r['memory_mb']:9.1f} MB  peak {r['load_peak_mb']:9.1f} MB  "
+                  f"load {r['load_ms']:8.1f} ms  groupby {r['groupby_ms']:8.2f} ms  filter {r['filter_ms']:7.2f} ms")
+        results.extend(rows)
+    with open(args.out, "w") as f:
+        json.dump({"meta": {"when": dt.datetime.now().isoformat(timespec="seconds"), "pandas": pd.__version__},
+                   "results": results}, f, indent=2)
+    print(f"\nreport written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Rerun latency of a set-form keystroke, full-page vs fragment-scoped.
+
+    python benchmarks/rerun_latency.py [--sets 100000] [--repeat 5] [--baseline REV]
+
+Builds a synthetic log in a scratch directory, then drives app.py headlessly
+with streamlit's AppTest, changing a "Reps" input each round. AppTest always
+re-executes the whole script, so the fragment cost is taken from timing the
+fragment functions themselves (st.fragment is wrapped before the app loads);
+that is the work a live server does when only the fragment reruns.
+
+With --baseline, the same interaction is timed against app.py at that git
+revision (e.g. the commit before fragments) for a before/after comparison.
+The baseline app imports the current modules, so revisions from before the
+tracker/ package (flat storage.py etc.) need that revision checked out.
+"""
+import argparse
+import collections
+import functools
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import synthetic_log  # noqa: E402
+
+FRAGMENT_TIMES = collections.defaultdict(list)
+_real_fragment = st.fragment
+
+
+def _timed_fragment(func=None, **kwargs):
+    def deco(f):
+        @functools.wraps(f)
+        def timed(*a, **k):
+            t0 = time.perf_counter()
+            try:
+                return f(*a, **k)
+            finally:
+                FRAGMENT_TIMES[f.__name__].append(time.perf_counter() - t0)
+        return _real_fragment(timed, **kwargs)
+    return deco(func) if func is not None else deco
+
+
+def time_keystrokes(app_path: str, repeat: int):
+    at = AppTest.from_file(app_path, default_timeout=600)
+    at.secrets["SUPABASE_URL"] = ""; at.secrets["SUPABASE_KEY"] = ""
+    at.run()  # warm-up: migrations, caches
+    FRAGMENT_TIMES.clear()
+    full = []
+    for i in range(repeat):
+        at.number_input(key="reps_1").set_value(i + 1)
+        t0 = time.perf_counter(); at.run(); full.append(time.perf_counter() - t0)
+        if at.exception: raise RuntimeError(at.exception[0].value)
+    return statistics.median(full), {k: statistics.median(v) for k, v in FRAGMENT_TIMES.items()}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sets", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baseline", help="git revision of app.py to compare against")
+    args = ap.parse_args()
+
+    st.fragment = _timed_fragment
+    sys.path.insert(0, ROOT)
+    log = synthetic_log(args.sets)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        if args.baseline:
+            base_app = os.path.join(tmp, "app_baseline.py")
+            with open(base_app, "w") as f:
+                f.write(subprocess.check_output(["git", "-C", ROOT, "show", f"{args.baseline}:app.py"], text=True))
+            log.to_csv("workout_log.csv", index=False)
+            results["baseline"] = time_keystrokes(base_app, args.repeat)
+        log.to_csv("workout_log.csv", index=False)
+        for f in ("workout.db", "workout.db-wal", "workout.db-shm"):
+            if os.path.exists(f): os.remove(f)
+        results["current"] = time_keystrokes(os.path.join(ROOT, "app.py"), args.repeat)
+
+    print(f"set-form keystroke, {args.sets:,} logged sets, median of {args.repeat}")
+    for name, (full, frags) in results.items():
+        print(f"  {name:<9} full-page rerun: {full * 1000:8.1f} ms")
+        for frag, sec in sorted(frags.items()):
+            print(f"  {'':<9} fragment {frag:<24} {sec * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Cold-start cost of the CLI and of the imports behind the app.
+
+    python benchmarks/startup.py [--repeat 5] [--sets 10000] [--out startup_report.json]
+
+Each command runs in a fresh interpreter (median wall time of --repeat):
+
+  python            `python -c pass`, the floor everything else sits on
+  import tracker    the package itself (submodules load lazily)
+  cli --help        `python -m tracker --help` (no pandas)
+  cli check-plan    compile the built-in plan
+  cli report        XP, trends and PRs from a synthetic SQLite log of --sets rows
+  app imports       streamlit plus every tracker module app.py imports
+
+Add `-X importtime` to one of the commands by hand to see where a regression
+comes from.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, HERE]
+
+APP_IMPORTS = ("import streamlit, tracker.storage, tracker.snapshot, tracker.aggregates, tracker.analytics, "
+               "tracker.recommend, tracker.metrics, tracker.writeback, tracker.program, tracker.plans, "
+               "tracker.diagnostics, tracker.prefetch, tracker.importer")
+
+
+def wall(cmd, repeat: int, cwd: str) -> float:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+        out.append(time.perf_counter() - t0)
+    return statistics.median(out)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--sets", type=int, default=10_000)
+    ap.add_argument("--out", default="startup_report.json")
+    args = ap.parse_args()
+
+    from synthetic import synthetic_log
+    from tracker.storage import SqliteStorage
+    py = sys.executable
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        SqliteStorage(os.path.join(tmp, "workout.db")).append_sets(synthetic_log(args.sets).to_dict("records"))
+        for name, cmd in [
+            ("python", [py, "-c", "pass"]),
+            ("import tracker", [py, "-c", "import tracker"]),
+            ("cli --help", [py, "-m", "tracker", "--help"]),
+            ("cli check-plan", [py, "-m", "tracker", "check-plan"]),
+            ("cli report", [py, "-m", "tracker", "report"]),
+            ("app imports", [py, "-c", APP_IMPORTS]),
+        ]:
+            results[name] = wall(cmd, args.repeat, tmp)
+            print(f"{name:<16} {results[name] * 1000:8.1f} ms")
+    with open(args.out, "w") as f:
+        json.dump({"repeat": args.repeat, "sets": args.sets, "ms": {k: round(v * 1000, 1) for k, v in results.items()}}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Realistic synthetic training histories generated from the SPLIT program.
+
+The six days are trained in rotation, six sessions a week, with every
+exercise's prescribed sets. Reps fall inside each block's range (timed
+blocks log 1 rep), loads climb slowly per exercise with noise, tempo and
+notes are NULL (as in logs migrated from the CSV layout), and the XP
+ledger gets one keyed "<exercise> sets" award per exercise per session plus
+the occasional plan check-off, as the app writes them. Everything is
+vectorized so 1M sets take a few seconds.
+"""
+import datetime as dt
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracker.program import SPLIT, XP  # noqa: E402
+from tracker.metrics import estimate_1rm, volume  # noqa: E402
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+
+def _template() -> pd.DataFrame:
+    rows = []
+    for session, (day, blocks) in enumerate(SPLIT.items()):
+        for block in blocks:
+            lo, hi = block["reps"] or (1, 1)
+            for s in range(1, block["sets"] + 1):
+                rows.append({"slot": session, "day_name": day, "exercise": block["exercise"], "set_number": s,
+                             "lo": lo, "hi": hi, "xp": XP.get(block["category"], 6)})
+    return pd.DataFrame(rows)
+
+
+def synthetic_log(n: int, seed: int = 7, end: dt.date = None) -> pd.DataFrame:
+    """`n` sets in DEFAULT_LOG_COLUMNS order, oldest first, ending at `end` (today)."""
+    rng = np.random.default_rng(seed)
+    tpl = _template()
+    per_cycle = len(tpl)
+    cycles = -(-n // per_cycle)
+    df = pd.concat([tpl] * cycles, ignore_index=True).iloc[:n].copy()
+    cycle = np.arange(len(df)) // per_cycle
+    session = cycle * len(SPLIT) + df["slot"].to_numpy()           # running session number
+    days_back = (session.max() - session) * 7 // 6                  # six sessions a week
+    end = end or dt.date.today()
+    dates = pd.to_datetime(end) - pd.to_timedelta(days_back, unit="D")
+
+    reps = rng.integers(df["lo"].to_numpy(), df["hi"].to_numpy() + 1)
+    base = rng.choice(np.arange(20.0, 120.0, 2.5), size=per_cycle)[np.arange(len(df)) % per_cycle]
+    weight = np.round((base * (1 + 0.004 * cycle) + rng.normal(0, 2.5, len(df))) / 2.5) * 2.5
+    weight = np.maximum(weight, 0)
+    rir = rng.choice([0.0, 1.0, 1.5, 2.0, 2.5, 3.0], size=len(df))
+
+    out = pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"), "week": 1 + days_back.max() // 7 - days_back // 7,
+        "day_name": df["day_name"].to_numpy(), "exercise": df["exercise"].to_numpy(),
+        "set_number": df["set_number"].to_numpy(), "reps": reps, "weight": weight, "rir": rir,
+        "tempo": None, "notes": None, "xp": df["xp"].to_numpy(),
+    })
+    out["est_1rm"] = estimate_1rm(out["reps"], out["weight"], out["rir"])
+    out["volume"] = volume(out["reps"], out["weight"])
+    return out[["date","week","day_name","exercise","set_number","reps","weight","rir","tempo","notes","est_1rm","volume","xp"]]
+
+
+def synthetic_xp(log: pd.DataFrame, seed: int = 7) -> pd.DataFrame:
+    """XP ledger matching `log`: one keyed award per (date, exercise) plus ~30% check-offs."""
+    rng = np.random.default_rng(seed)
+    g = log.groupby(["date", "day_name", "exercise"], sort=False)["xp"].sum().reset_index()
+    sets = pd.DataFrame({"date": g["date"], "task": g["exercise"] + " sets", "xp": g["xp"],
+                         "event_key": g["date"] + "|" + g["day_name"] + "|" + g["exercise"] + "|sets:" + g.index.astype(str)})
+    ticks = g[rng.random(len(g)) < 0.3]
+    check = pd.DataFrame({"date": ticks["date"], "task": ticks["exercise"], "xp": ticks["xp"] // 3,
+                          "event_key": ticks["date"] + "|" + ticks["day_name"] + "|" + ticks["exercise"] + "|checkoff"})
+    return pd.concat([sets, check]).sort_values("date", kind="stable").reset_index(drop=True)
@@ -0,0 +1,7 @@
+"""Maintenance commands; same as `python -m tracker` (see tracker/cli.py)."""
+import sys
+
+from tracker.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""Workout tracker core: storage backends, metrics, plans and derived views.
+
+Nothing here imports Streamlit. Submodules load on first use, so
+`import tracker` is free and `tracker.estimate_1rm` pulls in only metrics.py
+(and pandas); the supabase client is never imported by this package.
+"""
+import importlib
+
+_EXPORTS = {
+    "storage": ["Storage", "CsvStorage", "SqliteStorage", "SupabaseStorage", "DEFAULT_LOG_COLUMNS", "DEFAULT_USER",
+                "partition_path", "typed_log", "write_csv_export", "migrate_csv_to_sqlite"],
+    "metrics": ["FORMULAS", "estimate_1rm", "volume", "with_metrics"],
+    "program": ["SPLIT", "XP", "level_and_progress"],
+    "plans": ["Plan", "PlanError", "PlanRegistry", "compile_plan", "read_plan"],
+    "snapshot": ["LogSnapshot"],
+    "aggregates": ["SessionAggregates"],
+    "analytics": ["Analytics", "AnalyticsCache"],
+    "recommend": ["LatestSessions", "next_targets"],
+    "importer": ["import_log"],
+}
+_WHERE = {name: mod for mod, names in _EXPORTS.items() for name in names}
+__all__ = sorted(_WHERE)
+
+
+def __getattr__(name: str):
+    if name not in _WHERE:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_WHERE[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
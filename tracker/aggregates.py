@@ -0,0 +1,98 @@
+import datetime as dt
+import pandas as pd
+from typing import Dict, List
+
+# ──────────────────────────────────────────────────────────────
+# PER-EXERCISE SESSION AGGREGATES (kept in step with the LogSnapshot)
+# ──────────────────────────────────────────────────────────────
+METRICS = ["weight","reps","volume","est_1rm"]
+BEST_COLUMNS = ["date","exercise","reps","weight","est_1rm","volume","notes"]
+BEST_K = 10  # best sets kept per session; the Progress table shows the top 10 overall
+SUM_COLUMNS = ["volume","weight_sum","weight_n","reps_sum","reps_n","sets"]
+
+
+def session_of(dates: pd.Series) -> pd.Series:
+    """Session day (midnight timestamp) of each set; a no-op parse for typed logs."""
+    return pd.to_datetime(dates).dt.normalize()
+
+
+class SessionAggregates:
+    """Per exercise: one row per session date with volume sum, est-1RM max and
+    the sums/counts behind the weight/reps means, plus the session's best sets.
+
+    Switching exercise or metric in the Progress view is then a dict lookup
+    and a column read. Subscribe it to a LogSnapshot: appends merge into the
+    touched exercises only, deletes rebuild only the affected sessions.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, pd.DataFrame] = {}  # exercise -> stats indexed by session date
+        self.best: Dict[str, pd.DataFrame] = {}      # exercise -> top BEST_K rows per session, best first
+
+    # --- snapshot listener ---
+    def on_reset(self, frame: pd.DataFrame):
+        self.sessions, self.best = {}, {}
+        self._merge(frame)
+
+    def on_append(self, rows: pd.DataFrame):
+        self._merge(rows)
+
+    def on_discard(self, removed: pd.DataFrame, frame: pd.DataFrame):
+        hit = removed.assign(session=session_of(removed["date"])).groupby("exercise", observed=True)["session"].agg(set)
+        for ex, days in hit.items():
+            if ex in self.sessions:
+                self.sessions[ex] = self.sessions[ex].drop(index=list(days), errors="ignore")
+                self.best[ex] = self.best[ex][~self.best[ex]["session"].isin(days)]
+            rows = frame[frame["exercise"] == ex]
+            self._merge(rows[session_of(rows["date"]).isin(days)])
+            if ex in self.sessions and self.sessions[ex].empty:
+                del self.sessions[ex], self.best[ex]
+
+    # --- incremental merge (vectorized per batch, looped per exercise) ---
+    def _merge(self, rows: pd.DataFrame):
+        if rows is None or rows.empty: return
+        df = rows.copy()
+        df["session"] = session_of(df["date"])
+        for c in METRICS: df[c] = pd.to_numeric(df[c], errors="coerce").astype(float)
+        g = df.groupby(["exercise", "session"], observed=True)
+        part = pd.DataFrame({
+            "volume": g["volume"].sum(), "est_1rm": g["est_1rm"].max(),
+            "weight_sum": g["weight"].sum(), "weight_n": g["weight"].count(),
+            "reps_sum": g["reps"].sum(), "reps_n": g["reps"].count(), "sets": g.size(),
+        })
+        top = df.assign(reps=rows["reps"]).sort_values(["est_1rm","volume"], ascending=False)  # whole reps in Best Sets
+        top = top.groupby(["exercise", "session"], sort=False, observed=True).head(BEST_K)[BEST_COLUMNS + ["session"]]
+
+        for ex, p in part.groupby(level="exercise", observed=True):
+            p = p.droplevel("exercise")
+            old = self.sessions.get(ex)
+            if old is not None:
+                merged = old[SUM_COLUMNS].add(p[SUM_COLUMNS], fill_value=0)
+                merged["est_1rm"] = pd.concat([old["est_1rm"], p["est_1rm"]], axis=1).max(axis=1)
+                p = merged[p.columns]
+            self.sessions[ex] = p.sort_index()
+        for ex, t in top.groupby("exercise", sort=False, observed=True):
+            old = self.best.get(ex)
+            if old is not None:
+                t = pd.concat([old, t]).sort_values(["est_1rm","volume"], ascending=False)
+                t = t.groupby("session", sort=False).head(BEST_K)
+            self.best[ex] = t
+
+    # --- lookups for the Progress view ---
+    def exercises(self) -> List[str]:
+        return sorted(self.sessions)
+
+    def series(self, exercise: str, metric: str) -> pd.Series:
+        s = self.sessions.get(exercise)
+        if s is None: return pd.Series(dtype=float, name=metric)
+        if metric in ("volume", "est_1rm"):
+            out = s[metric]
+        else:
+            out = s[f"{metric}_sum"] / s[f"{metric}_n"].where(s[f"{metric}_n"] > 0)
+        return out.rename(metric).rename_axis("session")
+
+    def best_sets(self, exercise: str, since: dt.date, n: int = 10) -> pd.DataFrame:
+        b = self.best.get(exercise)
+        if b is None: return pd.DataFrame(columns=BEST_COLUMNS)
+        out = b[b["session"] >= pd.Timestamp(since)].head(n)[BEST_COLUMNS].reset_index(drop=True)
+        return out.assign(date=pd.to_datetime(out["date"]).dt.date)
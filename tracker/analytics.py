@@ -0,0 +1,140 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from .aggregates import session_of
+
+# ──────────────────────────────────────────────────────────────
+# ALL-EXERCISE ANALYTICS (one vectorized pass over the log, memoized by version)
+# ──────────────────────────────────────────────────────────────
+PERIODS = ["week", "month"]             # rollups by period start (Monday / 1st of month)
+GROUPINGS = {"category": "category", "day": "day_name"}
+MEASURES = ["tonnage", "sets", "reps", "top_1rm"]
+TREND_DAYS = 90        # est-1RM slopes are fitted over this many days up to `asof`
+TREND_MIN_SESSIONS = 3
+PR_COLUMNS = ["date","exercise","category","reps","weight","est_1rm","kind","previous"]
+TREND_COLUMNS = ["exercise","category","sessions","first","latest","best","per_week","pct_per_week"]
+
+
+def categorise(day: pd.Series, exercise: pd.Series, plan) -> pd.Categorical:
+    """Plan category of each set: by (day, exercise), else by exercise on any day, else 'other'.
+
+    Resolved once per (day, exercise) category pair, then gathered by code.
+    """
+    day, exercise = day.astype("category").cat, exercise.astype("category").cat
+    by_ex = {ex: b["category"] for (_, ex), b in reversed(list(plan.index.items()))}
+    names = [[plan.category(d, e, by_ex.get(e, "other")) for e in exercise.categories] + ["other"]
+             for d in day.categories] + [["other"] * (len(exercise.categories) + 1)]
+    cats = sorted({c for row in names for c in row})
+    table = np.array([[cats.index(c) for c in row] for row in names])
+    return pd.Categorical.from_codes(table[day.codes, exercise.codes], cats)  # code -1 (missing) hits the 'other' row/column
+
+
+def prepare(frame: pd.DataFrame, plan) -> pd.DataFrame:
+    """The columns the rollups need, typed once: session day, categorical labels and float metrics."""
+    df = pd.DataFrame({
+        "session": session_of(frame["date"]),
+        "exercise": frame["exercise"].astype("category"),
+        "day_name": frame["day_name"].astype("category"),
+        "id": pd.to_numeric(frame["id"], errors="coerce") if "id" in frame.columns else np.arange(len(frame)),
+    })
+    for c in ("reps", "weight", "est_1rm", "volume"):
+        df[c] = pd.to_numeric(frame[c], errors="coerce").astype(float).to_numpy()
+    df["week"] = df["session"] - pd.to_timedelta(df["session"].dt.weekday, unit="D")
+    df["month"] = df["session"].to_numpy().astype("datetime64[M]").astype(df["session"].dtype)
+    df["category"] = categorise(df["day_name"], df["exercise"], plan)
+    return df.dropna(subset=["session"]).reset_index(drop=True)
+
+
+def rollup(df: pd.DataFrame, period: str, by: str) -> pd.DataFrame:
+    """sets / reps / tonnage / top est-1RM per (period start, group), long format."""
+    g = df.groupby([df[period].rename("period"), df[GROUPINGS[by]].rename("group")], observed=True, sort=True)
+    return pd.DataFrame({"sets": g.size(), "reps": g["reps"].sum(), "tonnage": g["volume"].sum(),
+                         "top_1rm": g["est_1rm"].max()}).reset_index()
+
+
+def pr_events(df: pd.DataFrame) -> pd.DataFrame:
+    """Each session's best set where it beats every earlier session of that
+    exercise, for est-1RM and for weight (running max per exercise).
+
+    The first session of an exercise is its baseline, not a PR.
+    """
+    keys = [df["exercise"], df["session"]]
+    out = []
+    for col, kind in (("est_1rm", "1RM"), ("weight", "weight")):
+        best = df.groupby(keys, sort=True, observed=True)[col].max()
+        prior = best.groupby(level=0, sort=False).cummax().groupby(level=0, sort=False).shift()
+        prev = prior.reindex(pd.MultiIndex.from_arrays(keys)).to_numpy()
+        beat = df[col].to_numpy() > prev  # NaN prior (first session) never beats
+        hit = df[beat].assign(kind=kind, previous=prev[beat])
+        out.append(hit.sort_values([col, "id"], ascending=[False, True]).drop_duplicates(["exercise", "session"]))
+    ev = pd.concat(out, ignore_index=True).sort_values(["session", "exercise", "kind"], ascending=[False, True, True])
+    return ev.rename(columns={"session": "date"}).reindex(columns=PR_COLUMNS).reset_index(drop=True)
+
+
+def trend_slopes(df: pd.DataFrame, asof: dt.date, days: int = TREND_DAYS) -> pd.DataFrame:
+    """Least-squares slope of session-best est-1RM per exercise over the last `days`.
+
+    Closed form from grouped sums, so every exercise is fitted at once.
+    """
+    lo = pd.Timestamp(asof) - pd.Timedelta(days=days - 1)
+    recent = df[(df["session"] >= lo) & (df["session"] <= pd.Timestamp(asof))]
+    s = recent.groupby(["exercise", "session"], sort=True, observed=True)["est_1rm"].max().reset_index()
+    s = s[s["est_1rm"] > 0]
+    if s.empty: return pd.DataFrame(columns=TREND_COLUMNS)
+    x = (s["session"] - lo).dt.days.astype(float)
+    y = s["est_1rm"]
+    g = pd.DataFrame({"exercise": s["exercise"], "x": x, "y": y, "xx": x * x, "xy": x * y}).groupby("exercise", sort=True, observed=True)
+    n, sums = g.size(), g.sum()
+    den = n * sums["xx"] - sums["x"] ** 2
+    slope = (n * sums["xy"] - sums["x"] * sums["y"]) / den.where(den > 0)
+    ends = s.groupby("exercise", sort=True, observed=True)["est_1rm"]
+    out = pd.DataFrame({"sessions": n, "first": ends.first(), "latest": ends.last(), "best": ends.max(),
+                        "per_week": (slope * 7).round(2)})
+    out["pct_per_week"] = (100 * out["per_week"] / out["first"]).round(2)
+    cats = recent.drop_duplicates("exercise").set_index("exercise")["category"]
+    out = out[out["sessions"] >= TREND_MIN_SESSIONS].assign(category=cats)
+    return out.reset_index().sort_values("per_week", ascending=False).reindex(columns=TREND_COLUMNS).reset_index(drop=True)
+
+
+class Analytics:
+    """Every dashboard table for one version of the log.
+
+    Rollups for each (period, grouping) are computed on first use and kept;
+    PR events and trend slopes are computed once.
+    """
+
+    def __init__(self, frame: pd.DataFrame, plan, asof: dt.date):
+        self.data = prepare(frame, plan)
+        self.asof = asof
+        self._rollups: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self.prs = pr_events(self.data)
+        self.trends = trend_slopes(self.data, asof)
+
+    def rollup(self, period: str, by: str) -> pd.DataFrame:
+        if (period, by) not in self._rollups:
+            self._rollups[(period, by)] = rollup(self.data, period, by)
+        return self._rollups[(period, by)]
+
+    def recent_prs(self, days: int = TREND_DAYS) -> pd.DataFrame:
+        since = pd.Timestamp(self.asof) - pd.Timedelta(days=days - 1)
+        out = self.prs[self.prs["date"] >= since]
+        return out.assign(date=out["date"].dt.date)
+
+    def frames(self) -> List[pd.DataFrame]:
+        return [self.data, self.prs, self.trends] + list(self._rollups.values())
+
+
+class AnalyticsCache:
+    """One Analytics per (log version, plan, day); anything else is a rebuild."""
+
+    def __init__(self):
+        self.key: Optional[Tuple] = None
+        self.value: Optional[Analytics] = None
+
+    def get(self, frame: pd.DataFrame, version: int, plan, asof: dt.date) -> Analytics:
+        key = (version, plan, asof)  # the plan by identity: a recompiled plan is a new key
+        if key != self.key:
+            self.value, self.key = Analytics(frame, plan, asof), key
+        return self.value
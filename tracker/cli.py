@@ -0,0 +1,248 @@
+"""Command line for the workout tracker data (no Streamlit needed).
+
+    python -m tracker report [--day DAY] [--days 90] [--backend ...]
+    python -m tracker export [OUT.csv|OUT.csv.gz|-] [--exercise NAME] [--start DATE] [--end DATE] [--backend ...]
+    python -m tracker migrate [--log workout_log.csv] [--xp xp_log.csv] [--db workout.db] [--force]
+    python -m tracker reconcile [--backend sqlite|csv|supabase]
+    python -m tracker recompute [--formula epley|brzycki|lombardi|rir] [--backend ...]   (alias: backfill)
+    python -m tracker compact-xp [--dry-run] [--backend ...]
+    python -m tracker check-plan [plan.csv|plan.json]
+    python -m tracker import FILE [--map "Exercise Name=exercise" ...] [--on-duplicate skip|update]
+                              [--no-xp] [--chunk-size 5000] [--restart] [--backend ...]
+    python -m tracker bench [bench|memory|startup|rerun-latency] [ARGS ...]
+
+`python manage.py ...` runs the same commands. Modules are imported per
+command, so parsing and --help never load pandas, and the supabase client
+is imported only for --backend supabase (SUPABASE_URL / SUPABASE_KEY from
+the environment). Storage commands act on one user's data: --user (or
+WORKOUT_USER), default "default".
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+
+def formula(name: str) -> str:
+    from .metrics import FORMULAS
+    if name not in FORMULAS:
+        raise argparse.ArgumentTypeError(f"unknown 1RM formula {name!r}; choose from {', '.join(FORMULAS)}")
+    return name
+
+
+def open_storage(args):
+    from .storage import DEFAULT_USER, CsvStorage, SqliteStorage, SupabaseStorage, partition_path
+    user = args.user or DEFAULT_USER
+    if args.backend == "supabase":
+        from supabase import create_client  # optional dependency
+        return SupabaseStorage(create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"]), user)
+    if args.backend == "csv":
+        return CsvStorage(partition_path(args.log, user), partition_path(args.xp, user))
+    return SqliteStorage(partition_path(args.db, user))
+
+
+def add_storage_args(p: argparse.ArgumentParser):
+    p.add_argument("--backend", choices=["sqlite", "csv", "supabase"], default=os.environ.get("WORKOUT_BACKEND", "sqlite"))
+    p.add_argument("--log", default="workout_log.csv")
+    p.add_argument("--xp", default="xp_log.csv")
+    p.add_argument("--db", default="workout.db")
+    p.add_argument("--user", default=os.environ.get("WORKOUT_USER"), help='athlete whose data to use (default "default")')
+
+
+def load_plan(path):
+    from .plans import PlanRegistry
+    return PlanRegistry().get(path)
+
+
+def cmd_report(args) -> int:
+    import datetime as dt
+    import pandas as pd
+    from .analytics import Analytics
+    from .program import level_and_progress
+    from .recommend import LatestSessions, next_targets
+    store, plan = open_storage(args), load_plan(args.plan)
+    xp = store.total_xp()
+    level, pct = level_and_progress(xp)
+    print(f"XP {xp} • level {level} ({pct}% to next)")
+    frame = store.load_log()
+    if frame.empty:
+        print("No sets logged yet.")
+        return 0
+    a = Analytics(frame, plan, dt.date.today())
+    days = a.data["session"]
+    print(f"{len(a.data)} set(s) over {days.nunique()} session(s), {days.min().date()} to {days.max().date()}")
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(f"\nEst. 1RM trend, last {args.days} days (per week)")
+        print(a.trends.to_string(index=False) if len(a.trends) else "  (needs 3+ sessions of an exercise)")
+        prs = a.recent_prs(args.days)
+        print(f"\nPRs, last {args.days} days: {len(prs)}")
+        if len(prs): print(prs.head(args.top).to_string(index=False))
+        if args.day:
+            if args.day not in plan.days:
+                print(f"\nunknown day {args.day!r}; plan days: {', '.join(plan.day_names)}", file=sys.stderr)
+                return 1
+            latest = LatestSessions()
+            latest.on_reset(frame)
+            print(f"\nNext session — {args.day}")
+            print(next_targets(latest, plan, args.day).to_string(index=False))
+    return 0
+
+
+def cmd_export(args) -> int:
+    from .storage import write_csv_export
+    store = open_storage(args)
+    gz = args.out.endswith(".gz")
+    t0 = time.perf_counter()
+    if args.out == "-":
+        n = write_csv_export(store, sys.stdout.buffer, args.exercise, args.start, args.end)
+    else:
+        with open(args.out, "wb") as f:
+            n = write_csv_export(store, f, args.exercise, args.start, args.end, compress=gz)
+    print(f"Exported {n} set(s) to {args.out} in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    return 0
+
+
+def cmd_migrate(args) -> int:
+    from .storage import migrate_csv_to_sqlite
+    try:
+        counts = migrate_csv_to_sqlite(args.log, args.xp, args.db, force=args.force)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Migrated {counts['sets']} set row(s) and {counts['xp']} XP row(s) into {args.db}")
+    return 0
+
+
+def cmd_reconcile(args) -> int:
+    stored, total = open_storage(args).reconcile_xp()
+    drift = total - stored
+    print(f"XP total: {total} (stored {stored}, {'no drift' if drift == 0 else f'corrected drift of {drift:+d}'})")
+    return 0
+
+
+def cmd_backfill(args) -> int:
+    t0 = time.perf_counter()
+    n = open_storage(args).backfill_metrics(args.formula)
+    print(f"Recomputed est_1rm/volume ({args.formula}) for {n} set(s) in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+def cmd_compact_xp(args) -> int:
+    store = open_storage(args)
+    removed = store.compact_xp(dry_run=args.dry_run)
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {removed} duplicate XP row(s); total now {store.total_xp()}")
+    return 0
+
+
+def cmd_check_plan(args) -> int:
+    from .plans import PlanError
+    try:
+        plan = load_plan(args.path)
+    except (OSError, PlanError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    for w in plan.warnings: print(f"warning: {w}")
+    print(f"{plan.source}: {len(plan.day_names)} day(s), {len(plan.index)} block(s), {len(plan.exercises)} exercise(s)")
+    return 0
+
+
+def cmd_import(args) -> int:
+    from .importer import IMPORT_CHUNK, checkpoint_path, import_log
+    from .plans import PlanError
+    mapping = dict(m.split("=", 1) for m in args.map)
+    if args.restart and os.path.exists(checkpoint_path(args.file)): os.remove(checkpoint_path(args.file))
+    def report(s):
+        print(f"\r{s['fraction'] * 100:5.1f}%  {s['rows']} read  {s['inserted']} new  {s['updated']} updated  "
+              f"{s['duplicates']} duplicate  {s['invalid']} invalid  {s['seconds']:.1f}s", end="", file=sys.stderr)
+    try:
+        stats = import_log(open_storage(args), args.file, mapping=mapping, plan=load_plan(args.plan),
+                           formula=args.formula, on_duplicate=args.on_duplicate, award_xp=not args.no_xp,
+                           chunk_size=args.chunk_size or IMPORT_CHUNK, progress=report)
+    except (OSError, ValueError, PlanError) as e:
+        print(f"\n{e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(f"Imported {stats['inserted']} set(s), updated {stats['updated']}, skipped {stats['duplicates']} duplicate(s) "
+          f"and {stats['invalid']} invalid row(s); +{stats['xp']} XP")
+    return 0
+
+
+def cmd_bench(args) -> int:
+    script = os.path.join(BENCHMARKS, args.suite.replace("-", "_") + ".py")
+    if not os.path.exists(script):
+        print(f"{script} not found (benchmarks ship with the source tree only)", file=sys.stderr)
+        return 1
+    return subprocess.call([sys.executable, script] + args.args)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tracker", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    default_formula = os.environ.get("WORKOUT_1RM_FORMULA", "epley")
+
+    p = sub.add_parser("report", help="XP and level, est-1RM trends, recent PRs and (with --day) next-session targets")
+    add_storage_args(p)
+    p.add_argument("--day", help="training day to print next-session targets for")
+    p.add_argument("--days", type=int, default=90, help="PR window in days")
+    p.add_argument("--top", type=int, default=20, help="PRs to list")
+    p.add_argument("--plan", default=os.environ.get("WORKOUT_PLAN_FILE"), help="plan file (categories, rep ranges)")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("export", help="stream the log (optionally filtered) to CSV; .gz compresses, - is stdout")
+    add_storage_args(p)
+    p.add_argument("out", nargs="?", default="workout_log_export.csv")
+    p.add_argument("--exercise")
+    p.add_argument("--start", help="first date, YYYY-MM-DD")
+    p.add_argument("--end", help="last date, YYYY-MM-DD")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("migrate", help="copy the legacy CSV logs into a SQLite database (one-shot)")
+    p.add_argument("--log", default="workout_log.csv")
+    p.add_argument("--xp", default="xp_log.csv")
+    p.add_argument("--db", default="workout.db")
+    p.add_argument("--force", action="store_true", help="append even if the database already has rows")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("reconcile", help="recompute the running XP total from the ledger and fix drift")
+    add_storage_args(p)
+    p.set_defaults(func=cmd_reconcile)
+
+    p = sub.add_parser("recompute", aliases=["backfill"], help="recompute est_1rm and volume for the whole stored log")
+    add_storage_args(p)
+    p.add_argument("--formula", type=formula, default=default_formula, help="epley, brzycki, lombardi or rir")
+    p.set_defaults(func=cmd_backfill)
+
+    p = sub.add_parser("compact-xp", help="collapse duplicate check-off awards left by old reruns")
+    add_storage_args(p)
+    p.add_argument("--dry-run", action="store_true")
+    p.set_defaults(func=cmd_compact_xp)
+
+    p = sub.add_parser("check-plan", help="validate a plan file (default: the built-in program)")
+    p.add_argument("path", nargs="?")
+    p.set_defaults(func=cmd_check_plan)
+
+    p = sub.add_parser("import", help="bulk-import sets from a CSV / JSON / JSON Lines export (resumable)")
+    add_storage_args(p)
+    p.add_argument("file")
+    p.add_argument("--map", action="append", default=[], metavar="SOURCE=COLUMN",
+                   help="map a source column onto a log column (repeatable); common headers map themselves")
+    p.add_argument("--on-duplicate", choices=["skip", "update"], default="skip",
+                   help="sets already stored with the same date, exercise and set number")
+    p.add_argument("--no-xp", action="store_true", help="don't award XP for imported sets")
+    p.add_argument("--chunk-size", type=int, help="rows parsed per chunk (default 5000)")
+    p.add_argument("--formula", type=formula, default=default_formula, help="epley, brzycki, lombardi or rir")
+    p.add_argument("--plan", default=os.environ.get("WORKOUT_PLAN_FILE"), help="plan file for XP per exercise")
+    p.add_argument("--restart", action="store_true", help="ignore a checkpoint left by an interrupted run")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("bench", help="run a script from benchmarks/ (arguments are passed through)")
+    p.add_argument("suite", nargs="?", default="bench", choices=["bench", "memory", "startup", "rerun-latency"])
+    p.add_argument("args", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,222 @@
+import copy
+import datetime as dt
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .storage import SqliteStorage, Storage, SupabaseStorage
+
+# ──────────────────────────────────────────────────────────────
+# HOT-PATH DIAGNOSTICS (opt-in; a disabled Tracer costs one attribute check)
+# ──────────────────────────────────────────────────────────────
+SECTION_FIELDS = ["ms", "calls", "trips", "rows_read", "bytes_read", "rows_written", "bytes_written"]
+
+
+def frame_bytes(df) -> int:
+    """Deep in-memory size of a DataFrame (or a list of them); 0 for anything else."""
+    if isinstance(df, (list, tuple)): return sum(frame_bytes(d) for d in df)
+    return int(df.memory_usage(index=True, deep=True).sum()) if isinstance(df, pd.DataFrame) else 0
+
+
+class Tracer:
+    """Per-session record of what each rerun spent, section by section.
+
+    A full script run is bracketed by begin()/end(); page sections open
+    `section(name)` blocks (they nest) and every storage call made through
+    an InstrumentedStorage is charged to the innermost one; calls made on
+    other threads while a run is open (prefetched reads) are listed under
+    "prefetch". A fragment that reruns on its own gets a run of its own. Finished runs are kept in
+    `runs` (newest last) and, with `trace_path`, appended as JSON lines.
+    """
+
+    def __init__(self, enabled: bool = False, trace_path: Optional[str] = None, keep: int = 50):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.runs = deque(maxlen=keep)
+        self.current: Optional[Dict] = None
+        self._stack: List[Dict] = []
+        self._frames: Dict[str, Callable] = {}
+        self._thread: Optional[int] = None
+
+    def watch(self, name: str, frame: Callable):
+        """Report the memory of `frame()` (a DataFrame or list of them) at the end of every run."""
+        self._frames[name] = frame
+
+    # --- runs ---
+    def begin(self, kind: str = "full"):
+        if not self.enabled: return
+        if self.current is not None: self.end(interrupted=True)  # previous run stopped by st.rerun/exception
+        self.current = {"ts": dt.datetime.now().isoformat(timespec="milliseconds"), "kind": kind,
+                        "sections": [], "calls": [], "_t0": time.perf_counter()}
+        self._stack = []
+        self._thread = threading.get_ident()
+
+    def end(self, interrupted: bool = False):
+        run, self.current = self.current, None
+        if run is None: return
+        run["ms"] = round((time.perf_counter() - run.pop("_t0")) * 1000, 2)
+        run["trips"] = sum(c["trips"] for c in run["calls"])
+        run["memory"] = {name: frame_bytes(get()) for name, get in self._frames.items()}
+        if interrupted: run["interrupted"] = True
+        self.runs.append(run)
+        if self.trace_path:
+            with open(self.trace_path, "a") as f:
+                f.write(json.dumps(run, default=str) + "\n")
+
+    @contextmanager
+    def section(self, name: str):
+        if not self.enabled:
+            yield; return
+        own_run = self.current is None  # a fragment rerunning by itself
+        if own_run: self.begin(f"fragment:{name}")
+        sec = {"name": name, "parent": self._stack[-1]["name"] if self._stack else None,
+               **{k: 0 for k in SECTION_FIELDS}}
+        self.current["sections"].append(sec)
+        self._stack.append(sec)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            sec["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            self._stack.pop()
+            if own_run: self.end()
+
+    def traced(self, name: str):
+        """Decorator form of section(), for fragment functions."""
+        def deco(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.section(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def record(self, call: Dict):
+        run = self.current
+        if run is None: return  # background thread or outside any run
+        if threading.get_ident() != self._thread:
+            call["section"] = "prefetch"  # overlaps the sections; not charged to them
+            run["calls"].append(call)
+            return
+        call["section"] = self._stack[-1]["name"] if self._stack else None
+        run["calls"].append(call)
+        for sec in self._stack:  # section totals are inclusive of nested sections
+            sec["calls"] += 1
+            for k in SECTION_FIELDS[2:]: sec[k] += call[k]
+
+    # --- views for the panel ---
+    def last_full(self) -> Optional[Dict]:
+        return next((r for r in reversed(self.runs) if r["kind"] == "full"), None)
+
+    def history(self) -> pd.DataFrame:
+        return pd.DataFrame([{"time": r["ts"][11:], "run": r["kind"], "ms": r["ms"], "calls": len(r["calls"]),
+                              "trips": r["trips"], "mem MB": round(sum(r["memory"].values()) / 2**20, 1)}
+                             for r in reversed(self.runs)])
+
+
+# ──────────────────────────────────────────────────────────────
+# STORAGE PROXY
+# ──────────────────────────────────────────────────────────────
+def _payload(args, kwargs) -> List:
+    """Arguments that are rows being written: a dict or a list of dicts."""
+    return [v for v in list(args) + list(kwargs.values())
+            if isinstance(v, dict) or (isinstance(v, list) and all(isinstance(r, dict) for r in v))]
+
+
+def _rows(v) -> int:
+    return 1 if isinstance(v, dict) else len(v)
+
+
+class _Counted:
+    """Wraps a supabase client / query builder and counts every execute()."""
+
+    def __init__(self, obj, proxy: "InstrumentedStorage"):
+        self._obj, self._proxy = obj, proxy
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if name == "execute":
+            def execute(*args, **kwargs):
+                self._proxy._count_trip()
+                return attr(*args, **kwargs)
+            return execute
+        if not callable(attr): return attr
+        def chained(*args, **kwargs):
+            out = attr(*args, **kwargs)
+            return _Counted(out, self._proxy) if hasattr(out, "execute") else out
+        return chained
+
+
+class InstrumentedStorage:
+    """Storage proxy that times each public call and reports it to a Tracer.
+
+    Round trips are HTTP requests on Supabase, SQL statements on SQLite and
+    one per call on CSV. Rows/bytes read come from the returned frame
+    (in-memory size); rows/bytes written from the rows passed in (JSON size,
+    i.e. the wire payload on Supabase). Counting runs on a shallow copy of
+    the backend with its own client wrapper / connection, so the shared
+    store and the write-behind thread are untouched.
+    """
+
+    def __init__(self, inner: Storage, tracer: Tracer):
+        self.base = inner
+        self.tracer = tracer
+        self._counts = threading.local()  # trips per thread, so concurrent calls don't mix
+        self._inner = self._probe(inner)
+
+    def _count_trip(self):
+        self._counts.trips = self._trips + 1
+
+    @property
+    def _trips(self) -> int:
+        return getattr(self._counts, "trips", 0)
+
+    def _probe(self, store: Storage) -> Storage:
+        if isinstance(store, SupabaseStorage):
+            probe = copy.copy(store)
+            probe.client = _Counted(store.client, self)
+            return probe
+        if isinstance(store, SqliteStorage):
+            probe = copy.copy(store)
+            probe._local = threading.local()
+            connect = probe._conn
+            def traced_conn():
+                con = getattr(probe._local, "con", None)
+                if con is None:
+                    con = connect()
+                    con.set_trace_callback(self._count_statement)
+                return con
+            probe._conn = traced_conn
+            return probe
+        return store
+
+    def _count_statement(self, _sql: str):
+        self._count_trip()
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if name.startswith("_") or not callable(attr): return attr
+        def call(*args, **kwargs):
+            trips0, t0 = self._trips, time.perf_counter()
+            out = attr(*args, **kwargs)
+            ms = (time.perf_counter() - t0) * 1000
+            frame = out[0] if isinstance(out, tuple) and out and isinstance(out[0], pd.DataFrame) else out
+            written = _payload(args, kwargs)
+            rows_written = sum(_rows(v) for v in written)
+            if name.startswith("delete"): rows_written = int(bool(out))
+            self.tracer.record({
+                "op": name, "ms": round(ms, 2),
+                "trips": (self._trips - trips0) if self._inner is not self.base else 1,
+                "rows_read": len(frame) if isinstance(frame, pd.DataFrame) else 0,
+                "bytes_read": frame_bytes(frame),
+                "rows_written": rows_written,
+                "bytes_written": sum(len(json.dumps(v, default=str)) for v in written),
+            })
+            return out
+        return call
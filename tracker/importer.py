@@ -0,0 +1,269 @@
+"""Bulk import of set histories (CSV, JSON or JSON Lines) into any Storage.
+
+The source is read in chunks and never held whole. Each chunk is mapped
+onto DEFAULT_LOG_COLUMNS, gets est_1rm/volume/xp computed in one vectorized
+pass, is deduplicated on (date, exercise, set_number) against itself and
+the stored log, and is written in batches: new sets through write_batch
+(with one keyed XP award per date and exercise), existing ones through
+update_sets when `on_duplicate="update"`. On backends where update_sets
+rewrites the whole log (`Storage.defer_updates`, i.e. CSV) updates are
+gathered across chunks and applied UPDATE_HOLD rows at a time.
+
+After every chunk a checkpoint records how far the source has been
+consumed, so an interrupted import resumes from there. Redoing the chunk
+that failed is harmless: its written rows dedup away and its XP awards
+are keyed.
+"""
+import gzip
+import json
+import os
+import re
+import time
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .metrics import DEFAULT_FORMULA, estimate_1rm, volume
+from .plans import DEFAULT_XP, Plan
+from .storage import DEFAULT_LOG_COLUMNS, SET_KEY, Storage
+
+IMPORT_CHUNK = 5_000   # source rows parsed per chunk
+WRITE_BATCH = 1_000    # rows per write request / transaction
+UPDATE_HOLD = 50_000   # updates held for one whole-log rewrite (defer_updates); bounds memory and resume loss
+
+# Header spellings seen in other trackers' exports (after _norm), per target column.
+COLUMN_ALIASES: Dict[str, List[str]] = {
+    "date": ["date", "workout_date", "start_time", "performed_at", "timestamp", "day"],
+    "week": ["week", "week_number"],
+    "day_name": ["day_name", "workout_name", "workout", "title", "routine", "session"],
+    "exercise": ["exercise", "exercise_name", "exercise_title", "movement", "lift"],
+    "set_number": ["set_number", "set_order", "set", "set_no", "set_index"],
+    "reps": ["reps", "repetitions", "rep_count"],
+    "weight": ["weight", "weight_kg", "weight_lbs", "load", "kg", "lbs"],
+    "rir": ["rir", "reps_in_reserve"],
+    "rpe": ["rpe"],  # becomes rir = 10 - rpe when there is no rir column
+    "tempo": ["tempo"],
+    "notes": ["notes", "note", "set_notes", "comment", "comments"],
+    "xp": ["xp"],
+}
+STATS_FIELDS = ["rows", "inserted", "updated", "duplicates", "invalid", "chunks", "xp"]
+
+
+def _norm(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(name).strip().lower()).strip("_")
+
+
+def resolve_columns(columns: List[str], mapping: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """{source column: target column}. Explicit `mapping` entries win, then COLUMN_ALIASES."""
+    out = {src: dst for src, dst in (mapping or {}).items() if src in columns}
+    by_norm = {_norm(c): c for c in columns if c not in out}
+    for target, aliases in COLUMN_ALIASES.items():
+        if target in out.values(): continue
+        src = next((by_norm[a] for a in aliases if a in by_norm), None)
+        if src is not None: out[src] = target
+    return out
+
+
+def _iso_dates(col: pd.Series) -> pd.Series:
+    """YYYY-MM-DD per value (NA when unparseable). ISO timestamps keep their wall-clock date."""
+    # exports repeat a handful of timestamps per session: parse each distinct one once
+    codes, uniques = pd.factorize(col.astype("string"))
+    uniques = pd.Series(uniques, dtype="string")
+    iso = uniques.str.match(r"\d{4}-\d{2}-\d{2}").fillna(False)
+    out = uniques.str[:10].where(iso)
+    if (~iso).any():
+        other = pd.to_datetime(uniques[~iso], errors="coerce", format="mixed")
+        out[~iso] = other.dt.strftime("%Y-%m-%d")
+    return pd.Series(out.to_numpy()[codes], index=col.index, dtype="string").where(codes >= 0)
+
+
+# ──────────────────────────────────────────────────────────────
+# SOURCE READING
+# ──────────────────────────────────────────────────────────────
+def _kind(name: str) -> str:
+    name = name.lower().removesuffix(".gz")
+    if name.endswith((".jsonl", ".ndjson")): return "jsonl"
+    return "json" if name.endswith(".json") else "csv"
+
+
+def read_chunks(f: BinaryIO, kind: str, chunk_size: int, skip: int = 0) -> Iterator[pd.DataFrame]:
+    """Source rows `chunk_size` at a time, after skipping the first `skip` (already imported)."""
+    compression = "gzip" if getattr(f, "name", "").lower().endswith(".gz") else None
+    if kind == "csv":
+        reader = pd.read_csv(f, chunksize=chunk_size, dtype=str, keep_default_na=False, compression=compression,
+                             skiprows=range(1, skip + 1) if skip else None)
+    elif kind == "jsonl":
+        reader = pd.read_json(f, lines=True, chunksize=chunk_size, dtype=False, compression=compression)
+    else:
+        # a JSON array has no streaming parser in pandas: parse once, hand out slices
+        data = json.load(gzip.open(f) if compression else f)
+        records = data["sets"] if isinstance(data, dict) else data  # a bare array or {"sets": [...]}
+        reader = (pd.DataFrame(records[i:i + chunk_size]) for i in range(0, len(records), chunk_size))
+    n = 0
+    for chunk in reader:
+        if kind != "csv" and n + len(chunk) <= skip:
+            n += len(chunk); continue
+        if kind != "csv" and n < skip:
+            chunk = chunk.iloc[skip - n:]
+        n += len(chunk)
+        yield chunk
+
+
+# ──────────────────────────────────────────────────────────────
+# CHUNK PIPELINE (map -> metrics -> dedup)
+# ──────────────────────────────────────────────────────────────
+def prepare(chunk: pd.DataFrame, columns: Dict[str, str], xp_of: Dict[str, int], formula: str,
+            set_counters: Dict[str, int]) -> Tuple[pd.DataFrame, int]:
+    """Chunk in DEFAULT_LOG_COLUMNS with metrics filled; also the number of invalid rows dropped.
+
+    Rows without a parseable date or an exercise are invalid. Missing set
+    numbers count up per date and exercise across chunks (`set_counters`).
+    """
+    src = chunk[list(columns)].rename(columns=columns)
+    df = pd.DataFrame(index=src.index)
+    df["date"] = _iso_dates(src["date"]) if "date" in src else None
+    ex = src["exercise"].astype("string").str.strip() if "exercise" in src else pd.Series(pd.NA, index=src.index)
+    df["exercise"] = ex.where(ex != "")
+    valid = df["date"].notna() & df["exercise"].notna()
+    df, src = df[valid].copy(), src[valid]
+    num = lambda c: pd.to_numeric(src[c], errors="coerce") if c in src else pd.Series(float("nan"), index=src.index)
+    text = lambda c: src[c].astype("string").fillna("") if c in src else ""
+
+    df["week"] = num("week").round().astype("Int64")
+    df["day_name"] = text("day_name")
+    df["reps"] = num("reps").round().astype("Int64")
+    df["weight"] = num("weight").astype(float)
+    df["rir"] = num("rir") if "rir" in src else (10 - num("rpe")).clip(lower=0)
+    df["tempo"] = text("tempo")
+    df["notes"] = text("notes")
+    sets = num("set_number").round().astype("Int64")
+    if sets.isna().any():
+        key = df["date"] + "|" + df["exercise"]
+        nth = key.groupby(key, sort=False).cumcount() + 1 + key.map(set_counters).fillna(0).astype(int)
+        sets = sets.fillna(nth.astype("Int64"))
+        set_counters.update({k: int(v) for k, v in nth.groupby(key, sort=False).max().items()})
+    df["set_number"] = sets
+    df["est_1rm"] = estimate_1rm(df["reps"].astype(float), df["weight"], df["rir"].fillna(0), formula)
+    df["volume"] = volume(df["reps"].astype(float), df["weight"])
+    xp = num("xp") if "xp" in src else pd.Series(float("nan"), index=df.index)
+    df["xp"] = xp.fillna(df["exercise"].map(xp_of)).fillna(DEFAULT_XP).round().astype(int)
+    return df[DEFAULT_LOG_COLUMNS].reset_index(drop=True), int((~valid).sum())
+
+
+def split_duplicates(df: pd.DataFrame, existing: pd.DataFrame, update: bool) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+    """(new rows, rows to overwrite with their stored `id`, duplicates dropped).
+
+    Within the chunk the first copy of a key wins when skipping and the last
+    when updating, matching what a second pass over the stored log does.
+    """
+    keep = ~df.duplicated(SET_KEY, keep="last" if update else "first")
+    dropped = int((~keep).sum())
+    df = df[keep]
+    hit = df.merge(existing.drop_duplicates(SET_KEY), on=SET_KEY, how="left")["id"].to_numpy()
+    stored = pd.notna(hit)
+    fresh = df[~stored]
+    if not update:
+        return fresh, df.iloc[:0].assign(id=pd.Series(dtype="int64")), dropped + int(stored.sum())
+    return fresh, df[stored].assign(id=hit[stored].astype("int64")), dropped
+
+
+def _records(df: pd.DataFrame) -> List[Dict]:
+    # plain python values (no NA / numpy scalars) for every backend's driver
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def xp_awards(rows: pd.DataFrame) -> List[Dict]:
+    """One award per date and exercise written, keyed by the set numbers it covers.
+
+    The key follows the rows, not the batch, so a redone chunk re-awards
+    exactly the sets that did not land the first time.
+    """
+    g = rows.groupby(["date", "exercise"], sort=False).agg(xp=("xp", "sum"), lo=("set_number", "min"), hi=("set_number", "max"))
+    return [{"date": d, "task": f"{ex} sets (import)", "xp": int(r.xp), "event_key": f"{d}|import|{ex}|sets:{r.lo}-{r.hi}"}
+            for (d, ex), r in zip(g.index, g.itertuples())]
+
+
+# ──────────────────────────────────────────────────────────────
+# CHECKPOINT + DRIVER
+# ──────────────────────────────────────────────────────────────
+def checkpoint_path(source: str) -> str:
+    return source + ".import.json"
+
+
+def _load_checkpoint(path: Optional[str], stamp: Dict) -> Optional[Dict]:
+    if not path or not os.path.exists(path): return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("stamp") == stamp else None  # another file or other settings: start over
+
+
+def _save_checkpoint(path: Optional[str], state: Dict):
+    if not path: return
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def import_log(storage: Storage, source: Union[str, BinaryIO], name: Optional[str] = None,
+               mapping: Optional[Dict[str, str]] = None, plan: Optional[Plan] = None,
+               formula: str = DEFAULT_FORMULA, on_duplicate: str = "skip", award_xp: bool = True,
+               chunk_size: int = IMPORT_CHUNK, batch_size: int = WRITE_BATCH,
+               checkpoint: Optional[str] = None, progress: Optional[Callable[[Dict], None]] = None) -> Dict[str, int]:
+    """Import `source` (a path or binary file; `name` gives the format for files) into `storage`.
+
+    `checkpoint` (default: next to a path source) makes the import resumable:
+    it is written after every chunk and removed once the import completes.
+    `progress(stats)` is called after every chunk; stats hold the counters in
+    STATS_FIELDS plus `fraction` (0..1, by bytes read) and `seconds`.
+    Returns the final stats.
+    """
+    if on_duplicate not in ("skip", "update"): raise ValueError("on_duplicate must be 'skip' or 'update'")
+    owns = isinstance(source, str)
+    f = open(source, "rb") if owns else source
+    name = name or getattr(f, "name", "import.csv")
+    if owns and checkpoint is None: checkpoint = checkpoint_path(source)
+    try:
+        total = os.fstat(f.fileno()).st_size if owns else len(f.getbuffer()) if hasattr(f, "getbuffer") else 0
+        stamp = {"name": os.path.basename(name), "size": total, "chunk_size": chunk_size, "on_duplicate": on_duplicate}
+        state = _load_checkpoint(checkpoint, stamp) or {"stamp": stamp, "rows_done": 0, "set_counters": {},
+                                                        "stats": {k: 0 for k in STATS_FIELDS}}
+        stats, counters = state["stats"], state["set_counters"]
+        xp_of = {ex: b["xp"] for (_, ex), b in reversed(list(plan.index.items()))} if plan else {}
+        t0, columns = time.perf_counter(), None
+        deferred = []  # updates held for one update_sets call (Storage.defer_updates)
+        for chunk in read_chunks(f, _kind(name), chunk_size, state["rows_done"]):
+            columns = columns or resolve_columns(list(chunk.columns), mapping)
+            missing = [c for c in ("date", "exercise") if c not in columns.values()]
+            if missing:
+                raise ValueError(f"{name}: no column maps to {', '.join(missing)}; pass a mapping like --map 'Exercise Name=exercise'")
+            df, invalid = prepare(chunk, columns, xp_of, formula, counters)
+            existing = storage.log_keys(sorted(df["date"].unique().tolist()))
+            fresh, stale, dupes = split_duplicates(df, existing, on_duplicate == "update")
+            for i in range(0, len(fresh), batch_size):
+                part = fresh.iloc[i:i + batch_size]
+                awards = xp_awards(part) if award_xp else []
+                storage.write_batch(_records(part), awards)
+                stats["xp"] += sum(a["xp"] for a in awards)
+            if storage.defer_updates:
+                deferred += _records(stale)
+                if len(deferred) >= UPDATE_HOLD:
+                    storage.update_sets(deferred); deferred = []
+            else:
+                for i in range(0, len(stale), batch_size):
+                    storage.update_sets(_records(stale.iloc[i:i + batch_size]))
+            stats["rows"] += len(chunk); stats["invalid"] += invalid; stats["chunks"] += 1
+            stats["inserted"] += len(fresh); stats["updated"] += len(stale); stats["duplicates"] += dupes
+            state["rows_done"] += len(chunk)
+            # while updates are held (at most UPDATE_HOLD), a resume redoes their chunks (harmless: see above)
+            if not deferred: _save_checkpoint(checkpoint, state)
+            if progress:
+                progress(dict(stats, fraction=min(f.tell() / total, 1.0) if total else 0.0,
+                              seconds=round(time.perf_counter() - t0, 2)))
+        storage.update_sets(deferred)
+        if checkpoint and os.path.exists(checkpoint): os.remove(checkpoint)
+        return dict(stats, fraction=1.0, seconds=round(time.perf_counter() - t0, 2))
+    finally:
+        if owns: f.close()
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict
+
+# ──────────────────────────────────────────────────────────────
+# SET METRICS (vectorized: scalars, lists, arrays and Series all work)
+# ──────────────────────────────────────────────────────────────
+DEFAULT_FORMULA = "epley"
+
+
+def _num(x) -> np.ndarray:
+    return pd.to_numeric(pd.Series(np.ravel(x)), errors="coerce").to_numpy(dtype=float)
+
+
+def epley(reps: np.ndarray, weight: np.ndarray, rir: np.ndarray) -> np.ndarray:
+    return np.where(reps <= 1, weight, weight * (1 + reps / 30))
+
+
+def brzycki(reps: np.ndarray, weight: np.ndarray, rir: np.ndarray) -> np.ndarray:
+    # undefined from 37 reps up; cap there so high-rep sets stay finite
+    r = np.minimum(reps, 36)
+    return np.where(reps <= 1, weight, weight * 36 / (37 - r))
+
+
+def lombardi(reps: np.ndarray, weight: np.ndarray, rir: np.ndarray) -> np.ndarray:
+    return np.where(reps <= 1, weight, weight * np.power(np.maximum(reps, 1), 0.10))
+
+
+def rir_adjusted(reps: np.ndarray, weight: np.ndarray, rir: np.ndarray) -> np.ndarray:
+    # Epley on reps-to-failure: a set of 8 @ 2 RIR counts as 10 reps
+    return epley(reps + rir, weight, rir)
+
+
+FORMULAS: Dict[str, Callable] = {
+    "epley": epley,
+    "brzycki": brzycki,
+    "lombardi": lombardi,
+    "rir": rir_adjusted,
+}
+
+# Same formulas as SQL expressions, so a database can backfill in place
+# without shipping every row through Python. Placeholders: {r} {w} {k}.
+SQL_FORMULAS: Dict[str, str] = {
+    "epley": "case when {r} <= 1 then {w} else {w} * (1 + {r} / 30.0) end",
+    "brzycki": "case when {r} <= 1 then {w} else {w} * 36.0 / (37 - min({r}, 36)) end",
+    "lombardi": "case when {r} <= 1 then {w} else {w} * pow({r}, 0.10) end",
+    "rir": "case when {r} + {k} <= 1 then {w} else {w} * (1 + ({r} + {k}) / 30.0) end",
+}
+
+
+def sql_1rm(formula: str, reps: str = "reps", weight: str = "weight", rir: str = "rir") -> str:
+    """SQL expression for est_1rm over the given columns; agrees with estimate_1rm on NULLs
+    (missing reps or weight give 0, a missing RIR counts as 0)."""
+    expr = SQL_FORMULAS[formula].format(r=reps, w=weight, k=f"coalesce({rir}, 0)")
+    return f"case when {reps} is null or {weight} is null then 0 else round({expr}, 2) end"
+
+
+def estimate_1rm(reps, weight, rir=0, formula: str = DEFAULT_FORMULA) -> np.ndarray:
+    if formula not in FORMULAS:
+        raise ValueError(f"unknown 1RM formula {formula!r}; choose from {', '.join(FORMULAS)}")
+    r, w = _num(reps), _num(weight)
+    k = np.nan_to_num(np.broadcast_to(_num(rir), r.shape) if np.ndim(rir) else np.full(r.shape, _num(rir)[0]))
+    # non-numeric / missing reps or weight give 0, like the old scalar epley_1rm
+    return np.nan_to_num(np.round(FORMULAS[formula](r, w, k), 2))
+
+
+def volume(reps, weight) -> np.ndarray:
+    return np.nan_to_num(_num(reps) * _num(weight))
+
+
+def with_metrics(df: pd.DataFrame, formula: str = DEFAULT_FORMULA) -> pd.DataFrame:
+    """Copy of `df` with est_1rm and volume recomputed from reps/weight/rir."""
+    rir = df["rir"] if "rir" in df.columns else 0
+    return df.assign(est_1rm=estimate_1rm(df["reps"], df["weight"], rir, formula),
+                     volume=volume(df["reps"], df["weight"]))
@@ -0,0 +1,185 @@
+import csv
+import json
+import math
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .program import SPLIT, XP
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# ──────────────────────────────────────────────────────────────
+# PLAN REGISTRY (plan files -> validated, indexed Plan; reloaded on change)
+# ──────────────────────────────────────────────────────────────
+# CSV plans use the exported template layout, one row per block;
+# reps are "min-max" or "time" (then `duration` holds the sec/steps target).
+PLAN_COLUMNS = ["day","exercise","sets","reps","category","icon","tip","duration"]
+DEFAULT_XP = 6  # award for a category missing from XP
+
+
+class PlanError(ValueError):
+    """A plan file that cannot be used; `problems` lists every issue found."""
+
+    def __init__(self, source: str, problems: List[str]):
+        super().__init__(f"{source}: " + "; ".join(problems))
+        self.source, self.problems = source, problems
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value)) or str(value) == ""
+
+
+def _reps(value) -> Optional[Tuple[int, int]]:
+    """(min, max) from a tuple/list or a "6-8" / "6–8" string; None for time-based blocks."""
+    if value is None or (isinstance(value, float) and math.isnan(value)): return None
+    if isinstance(value, (list, tuple)): lo, hi = value
+    else:
+        text = str(value).strip().replace("–", "-")
+        if text in ("", "time"): return None
+        lo, _, hi = text.partition("-")
+        hi = hi or lo
+    return int(lo), int(hi)
+
+
+def _block(raw: Dict) -> Dict:
+    """One block in the SPLIT shape, with blank optional fields dropped."""
+    block = {"exercise": str(raw["exercise"]).strip(), "sets": int(raw["sets"]),
+             "reps": _reps(raw.get("reps")), "category": str(raw["category"]).strip()}
+    for k in ("icon", "tip"):
+        v = raw.get(k)
+        if not _blank(v): block[k] = str(v)
+    dur = raw.get("duration")
+    if not _blank(dur): block["duration"] = int(float(dur))
+    return block
+
+
+def read_plan(path: str) -> Dict[str, List[Dict]]:
+    """Raw {day: [block, ...]} from a .csv (template layout) or .json (SPLIT layout) file."""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict): raise PlanError(path, ["expected an object of day -> list of blocks"])
+        return data
+    with open(path, newline="", encoding="utf-8-sig") as f:  # stdlib csv: compiling a plan never loads pandas
+        reader = csv.DictReader(f, restval="")
+        missing = [c for c in ("day","exercise","sets","reps","category") if c not in (reader.fieldnames or [])]
+        if missing: raise PlanError(path, [f"missing column(s) {', '.join(missing)}"])
+        days: Dict[str, List[Dict]] = {}
+        for row in reader:
+            days.setdefault(row["day"], []).append(row)
+    return days
+
+
+def plan_rows(days: Dict[str, List[Dict]]) -> "pd.DataFrame":
+    """The CSV template for a plan; read_plan() loads it back unchanged."""
+    import pandas as pd
+    rows = []
+    for day, items in days.items():
+        for it in items:
+            r = it.get("reps"); rep_str = "time" if r is None else f"{r[0]}-{r[1]}"
+            rows.append({"day":day,"exercise":it["exercise"],"sets":it["sets"],"reps":rep_str,"category":it["category"],
+                         "icon":it.get("icon",""),"tip":it.get("tip",""),"duration":it.get("duration","")})
+    return pd.DataFrame(rows, columns=PLAN_COLUMNS)
+
+
+def compile_plan(days: Dict[str, List[Dict]], source: str = "built-in") -> "Plan":
+    """Validate a raw plan and build its lookup tables. Raises PlanError.
+
+    Errors: unreadable blocks, bad set/rep counts, a block with neither reps
+    nor duration, and the same exercise twice in one day (lookups are keyed
+    by day and exercise). The same exercise on several days is allowed and
+    reported in `warnings`, as are categories with no XP value.
+    """
+    problems, warnings = [], []
+    compiled: Dict[str, List[Dict]] = {}
+    seen: Dict[str, List[str]] = {}
+    for day, items in days.items():
+        blocks, names = [], set()
+        for i, raw in enumerate(items or [], 1):
+            try:
+                b = _block(raw)
+            except (KeyError, TypeError, ValueError) as e:
+                problems.append(f"{day} #{i}: unreadable block ({e})"); continue
+            where = f"{day} / {b['exercise'] or f'#{i}'}"
+            if not b["exercise"]: problems.append(f"{where}: empty exercise name")
+            if b["sets"] < 1: problems.append(f"{where}: sets must be at least 1")
+            if b["reps"] is None and "duration" not in b: problems.append(f"{where}: needs reps or a duration")
+            if b["reps"] is not None and not 0 < b["reps"][0] <= b["reps"][1]: problems.append(f"{where}: bad rep range {b['reps']}")
+            if b["exercise"] in names: problems.append(f"{where}: listed twice on the same day")
+            if b["category"] not in XP: warnings.append(f"{where}: category {b['category']!r} has no XP value (+{DEFAULT_XP})")
+            names.add(b["exercise"])
+            seen.setdefault(b["exercise"], []).append(day)
+            blocks.append(dict(b, xp=XP.get(b["category"], DEFAULT_XP)))
+        if not blocks: problems.append(f"{day}: no exercises")
+        compiled[str(day)] = blocks
+    if not compiled: problems.append("no training days")
+    for ex, on in seen.items():
+        if len(on) > 1: warnings.append(f"{ex} appears on {len(on)} days ({', '.join(on)})")
+    if problems: raise PlanError(source, problems)
+    return Plan(compiled, source, warnings)
+
+
+class Plan:
+    """A validated program with O(1) lookups.
+
+    `days` keeps the SPLIT shape (each block gains its `xp` award) for the
+    views that list a day; per-set lookups go through the (day, exercise)
+    index instead of scanning the day's blocks.
+    """
+
+    def __init__(self, days: Dict[str, List[Dict]], source: str = "built-in", warnings: List[str] = None):
+        self.days = days
+        self.source = source
+        self.warnings = warnings or []
+        self.day_names = list(days)
+        self.index: Dict[Tuple[str, str], Dict] = {(d, b["exercise"]): b for d, blocks in days.items() for b in blocks}
+        self.exercises = list(dict.fromkeys(ex for _, ex in self.index))
+        self.by_day: Dict[str, List[str]] = {d: [b["exercise"] for b in blocks] for d, blocks in days.items()}
+
+    def block(self, day: str, exercise: str) -> Optional[Dict]:
+        return self.index.get((day, exercise))
+
+    def target(self, day: str, exercise: str) -> Optional[Tuple[int, int]]:
+        b = self.index.get((day, exercise))
+        return b["reps"] if b else None
+
+    def category(self, day: str, exercise: str, default: str = "compound") -> str:
+        b = self.index.get((day, exercise))
+        return b["category"] if b else default
+
+    def xp(self, day: str, exercise: str) -> int:
+        b = self.index.get((day, exercise))
+        return b["xp"] if b else XP.get("compound", DEFAULT_XP)
+
+
+class PlanRegistry:
+    """Compiled plans by file path, recompiled only when the file changes.
+
+    get() costs one stat() per call once a file is compiled. A missing path
+    (or None) means the built-in SPLIT program. Thread-safe, so one registry
+    can be shared across sessions.
+    """
+
+    def __init__(self):
+        self._plans: Dict[Optional[str], Tuple[Tuple, Plan]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Optional[str] = None) -> Plan:
+        stamp = None
+        if path:
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        hit = self._plans.get(path)
+        if hit and hit[0] == stamp: return hit[1]
+        with self._lock:
+            hit = self._plans.get(path)
+            if hit and hit[0] == stamp: return hit[1]
+            plan = compile_plan(read_plan(path), path) if path else compile_plan(SPLIT)
+            self._plans[path] = (stamp, plan)
+            return plan
+
+    def forget(self, path: Optional[str] = None):
+        with self._lock:
+            self._plans.pop(path, None)
@@ -0,0 +1,41 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FetchTimeout  # the builtin TimeoutError from 3.11
+from typing import Callable, Dict, Tuple
+
+# ──────────────────────────────────────────────────────────────
+# CONCURRENT READS (a rerun's independent backend reads, issued together)
+# ──────────────────────────────────────────────────────────────
+FETCH_WORKERS = 8  # per process; bounds concurrent backend reads across all sessions
+
+
+def fetch_pool(workers: int = FETCH_WORKERS) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+
+
+class Prefetch:
+    """Reads for one rerun, started up front on a shared pool.
+
+    start() submits a read; result() waits for it (at most `timeout`
+    seconds, then FetchTimeout) so each section blocks only on its own
+    data. A read that was never started, as in a fragment-only rerun, runs
+    inline. Results are handed out once; close() drops whatever the run
+    did not use so a later rerun never sees it.
+    """
+
+    def __init__(self, pool: ThreadPoolExecutor, timeout: float = 10.0):
+        self.pool = pool
+        self.timeout = timeout
+        self._futures: Dict[Tuple, Future] = {}
+
+    def start(self, name: str, fn: Callable, *args):
+        key = (name,) + args
+        if key not in self._futures:
+            self._futures[key] = self.pool.submit(fn, *args)
+
+    def result(self, name: str, fn: Callable, *args):
+        fut = self._futures.pop((name,) + args, None)
+        return fn(*args) if fut is None else fut.result(self.timeout)
+
+    def close(self):
+        for fut in self._futures.values(): fut.cancel()
+        self._futures.clear()
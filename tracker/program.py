@@ -0,0 +1,115 @@
+from typing import Dict, List, Tuple
+
+# ──────────────────────────────────────────────────────────────
+# LEVELS, XP AWARDS & PROGRAM (plain data — no Streamlit needed)
+# ──────────────────────────────────────────────────────────────
+AVATARS = {
+    0: ("rookie", "Rookie"),
+    1: ("cadet", "Cadet"),
+    2: ("contender", "Contender"),
+    3: ("warrior", "Warrior"),
+    4: ("champion", "Champion"),
+    5: ("legend", "Legend"),
+}
+LEVEL_THRESHOLDS = [
+    (0, 0), (1, 150), (2, 350), (3, 650), (4, 1050), (5, 1600)
+]
+
+# XP awards (rough heuristic)
+XP = {
+    "compound": 12,
+    "unilateral": 10,
+    "isolation": 8,
+    "core": 10,
+    "erectors": 10,
+    "balance": 8,
+    "grip": 8,
+    "core/grip": 10,
+}
+
+# ──────────────────────────────────────────────────────────────
+# PROGRAM (PPL A/B with core, balance, grip, erectors)
+# rep tuples are (min_reps, max_reps). None => time/steps target in `duration`.
+# `tip` shows a concise cue; `icon` decorates the UI.
+SPLIT: Dict[str, List[Dict]] = {
+    "Push A — Chest + Triceps + Core": [
+        {"exercise": "Dumbell Bench Press", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🏋️", "tip": "Elbows ~45°, 2–3s eccentric"},
+        {"exercise": "Cable Fly", "sets": 3, "reps": (8, 12), "category": "isolation", "icon": "🦋", "tip": "Hug a tree, squeeze"},
+        {"exercise": "Incline  Cable Fly", "sets": 3, "reps": (8, 12), "category": "isolation", "icon": "🔥", "tip": "Feel chest during ecentric and concentric"},
+        {"exercise": "Incline Dumbbell Press", "sets": 3, "reps": (8, 10), "category": "compound", "icon": "📈", "tip": "Slight arch, deep stretch"},
+        {"exercise": "Weighted Dips", "sets": 3, "reps": (6, 12), "category": "compound", "icon": "😮‍💨", "tip": "Lean forward for better muscle engagement"},
+        {"exercise": "Overhead DB Triceps Extension", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "🎯", "tip": "Long head stretch"},
+        {"exercise": "Seated DB Lateral Raise", "sets": 3, "reps": (15, 20), "category": "isolation", "icon": "🏹", "tip": "Lead with elbows"},
+        {"exercise": "Rope Pushdown", "sets": 3, "reps": (12, 15), "category": "isolation", "icon": "🪢", "tip": "Flare rope at bottom"},
+        {"exercise": "Weighted Decline Sit-Up", "sets": 3, "reps": (10, 12), "category": "core", "icon": "🧱", "tip": "Ribs to pelvis"},
+        {"exercise": "Pallof Press", "sets": 3, "reps": (12, 15), "category": "core", "icon": "🧭", "tip": "Resist rotation"},
+    ],
+    
+    "Pull A — Width + Posterior + Grip + Lower Back": [
+        {"exercise": "Wide-Grip Pull-Up / Pulldown", "sets": 4, "reps": (6, 10), "category": "compound", "icon": "🦅", "tip": "Drive scapular depression"},
+        {"exercise": "T-Bar / Machine Row", "sets": 4, "reps": (8, 10), "category": "compound", "icon": "⚓", "tip": "Chest up"},
+        {"exercise": "Single-Arm DB Row", "sets": 3, "reps": (10, 12), "category": "unilateral", "icon": "🧲", "tip": "Shoulder square"},
+        {"exercise": "Reverse Fly / Face Pull", "sets": 3, "reps": (15, 20), "category": "isolation", "icon": "🎣", "tip": "ER + scap set"},
+        {"exercise": "Preacher Curl", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "🧪", "tip": "No shoulder swing"},
+        {"exercise": "Zottman / Reverse Curl", "sets": 3, "reps": (12, 15), "category": "forearms", "icon": "🔁", "tip": "Slow negative"},
+        {"exercise": "Back Extension (weighted)", "sets": 3, "reps": (15, 20), "category": "erectors", "icon": "🧱", "tip": "Neutral spine"},
+        {"exercise": "Plate Pinch Hold (sec)/ Farmer Walks", "sets": 3, "reps": None, "duration": 45, "category": "grip", "icon": "📀", "tip": "Thumbs crush"},
+    ],
+    
+   
+    "Legs A — Quads + Balance + Core": [
+        {"exercise": "Front / Safety Bar Squat", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🧊", "tip": "Upright torso, brace"},
+        {"exercise": "Bulgarian Split Squat (supported)", "sets": 3, "reps": (10, 12), "category": "unilateral", "icon": "🦵", "tip": "Use post for balance"},
+        {"exercise": "Walking Lunge / Step-Up", "sets": 3, "reps": (10, 10), "category": "unilateral", "icon": "🚶", "tip": "Knee tracks toes"},
+        {"exercise": "Leg Extension", "sets": 3, "reps": (12, 15), "category": "isolation", "icon": "🦿", "tip": "Squeeze at top"},
+        {"exercise": "Hanging Leg Raise / Ab Rollout", "sets": 3, "reps": (12, 15), "category": "core", "icon": "🏗️", "tip": "Posterior tilt"},
+        {"exercise": "Pallof Press", "sets": 3, "reps": (12, 15), "category": "core", "icon": "🧭", "tip": "Neutral pelvis"},
+        {"exercise": "Single-Leg Balance Reach (opt)", "sets": 2, "reps": (10, 10), "category": "balance", "icon": "🦶", "tip": "Soft knee, hinge"},
+    ],
+    "Push B — Shoulders + Triceps + Core": [
+        {"exercise": "Standing Overhead Press", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "📏", "tip": "Glutes tight, chin back"},
+        {"exercise": "Arnold Press", "sets": 3, "reps": (8, 10), "category": "compound", "icon": "🎛️", "tip": "Full ROM"},
+        {"exercise": "Barbell Front Delts", "sets": 3, "reps": (8, 12), "category": "isolation", "icon": "🛰️", "tip": "Slow, engaged retraction"},
+        {"exercise": "Cable Lateral Raise (slow ecc)", "sets": 3, "reps": (15, 20), "category": "isolation", "icon": "🌙", "tip": "2–3s down"},
+        {"exercise": "Machine Chest Press", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🛡️", "tip": "Neutral grip"},
+        {"exercise": "Cable Decline Flys", "sets": 3, "reps": (8, 15), "category": "isolation", "icon": "🎃", "tip": "Feel chest engage during reps"},
+        {"exercise": "Face Pull + Extension", "sets": 3, "reps": (12, 15), "category": "isolation", "icon": "🎯", "tip": "Constant tension"},
+        {"exercise": "Skullcrusher / Rope Ext.", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "💥", "tip": "Elbows still"},
+        {"exercise": "Cable Woodchop (per side)", "sets": 3, "reps": (12, 12), "category": "core", "icon": "🪓", "tip": "Hips quiet"},
+        {"exercise": "Side Plank Hip Raise (sec)", "sets": 3, "reps": None, "duration": 30, "category": "core", "icon": "🧱", "tip": "Ribs down"},
+    ],
+
+     "Pull B — Back Thickness + Biceps + Grip": [
+        {"exercise": "Barbell Row / Pendlay", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🛠️", "tip": "Torso ~15°, brace"},
+        {"exercise": "Weighted Pull-Up / Lat Pulldown", "sets": 4, "reps": (8, 10), "category": "compound", "icon": "🧗", "tip": "Drive elbows to hips"},
+        {"exercise": "Chest-Supported Row", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🧱", "tip": "Kelso Shrugs after failure"},
+        {"exercise": "Seated Cable Row", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🎣", "tip": "Pause at chest"},
+        {"exercise": "Barbell Curl", "sets": 3, "reps": (8, 10), "category": "isolation", "icon": "🌀", "tip": "Pin elbows"},
+        {"exercise": "Hammer Curl", "sets": 3, "reps": (10, 12), "category": "isolation", "icon": "🔨", "tip": "Neutral grip"},
+        {"exercise": "Farmer's Carry (steps)", "sets": 3, "reps": None, "duration": 40, "category": "grip", "icon": "🧺", "tip": "Tall, tight ribs"},
+    ],
+
+    "Legs B — Glutes + Hamstrings + Lower Back + Core": [
+        {"exercise": "Romanian Deadlift / New Deadlift Machine??", "sets": 4, "reps": (6, 8), "category": "compound", "icon": "🪵", "tip": "Hinge; shins vertical"},
+        {"exercise": "Seated Good Morning", "sets": 3, "reps": (10, 12), "category": "erectors", "icon": "🪑", "tip": "Brace, move hips"},
+        {"exercise": "Hip Thrust / Glute Bridge", "sets": 3, "reps": (10, 12), "category": "compound", "icon": "🍑", "tip": "Posterior tilt"},
+        {"exercise": "Hamstring Curl", "sets": 3, "reps": (10, 15), "category": "isolation", "icon": "🧵", "tip": "Toes neutral"},
+        {"exercise": "Weighted Side Plank (sec)", "sets": 3, "reps": None, "duration": 30, "category": "core", "icon": "🧱", "tip": "Hips stacked"},
+        {"exercise": "Back Extension / Reverse Hyper", "sets": 3, "reps": (15, 20), "category": "erectors", "icon": "🔁", "tip": "Control end-range"},
+        {"exercise": "Cable Crunch", "sets": 3, "reps": (10, 15), "category": "core", "icon": "🛞", "tip": "Slow concentric movement, avoid pulling with arms"},
+        {"exercise": "Suitcase Carry (steps)", "sets": 3, "reps": None, "duration": 40, "category": "core/grip", "icon": "🧳", "tip": "Anti-lean"},
+        {"exercise": "Kettlebell toe-touches", "sets": 3, "reps": (12, 20), "category": "core", "icon": "🍄", "tip": "Engage core to avoid lower back activation"},
+
+    ],
+}
+
+
+def level_and_progress(xp: int) -> Tuple[int,int]:
+    """Level for an XP total and percent progress toward the next level."""
+    level = 0
+    for lv, need in LEVEL_THRESHOLDS:
+        if xp >= need: level = lv
+    cur_need = next((need for lv,need in LEVEL_THRESHOLDS if lv==level), 0)
+    next_need = next((need for lv,need in LEVEL_THRESHOLDS if lv==level+1), cur_need)
+    progress = 0 if next_need==cur_need else int( (xp-cur_need) / (next_need-cur_need) * 100 )
+    return level, progress
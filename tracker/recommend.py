@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from .aggregates import session_of
+
+# ──────────────────────────────────────────────────────────────
+# NEXT-SESSION TARGETS (double progression off a latest-session index)
+# ──────────────────────────────────────────────────────────────
+INCREMENTS = {"compound": 5.0}  # load step by plan category
+DEFAULT_INCREMENT = 2.5         # matches the Log form's weight step
+EASY_RIR = 3                    # this many reps in reserve (or more) earns a double step
+DELOAD = 0.95                   # below the range at RIR <= 1: drop ~5%
+LATEST_COLUMNS = ["date","set_number","reps","weight","rir"]
+TARGET_COLUMNS = ["exercise","last","weight","reps","note"]
+
+
+def _summaries(rows: pd.DataFrame) -> Dict[str, Dict]:
+    """Top set of each exercise's session in `rows`: heaviest load, the reps
+    achieved at it and their RIR (one session per exercise expected)."""
+    at_top = rows[rows["weight"] == rows.groupby("exercise", observed=True)["weight"].transform("max")]
+    g = at_top.groupby("exercise", observed=True)
+    out = pd.DataFrame({"date": g["session"].first().dt.date, "weight": g["weight"].first(), "sets": g.size(),
+                        "min_reps": g["reps"].min().astype(int), "max_reps": g["reps"].max().astype(int),
+                        "rir": g["rir"].mean().round(1)})
+    out["rir"] = out["rir"].astype(object).where(out["rir"].notna(), None)
+    return out.to_dict("index")
+
+
+class LatestSessions:
+    """Per exercise: the latest session's sets and their top-set summary.
+
+    A snapshot listener like SessionAggregates: reset builds it in one
+    grouped pass, an append touches only the exercises it contains (a new
+    session replaces, the same session merges) and a delete rebuilds only
+    an exercise whose latest session lost a set. `get()` is a dict lookup.
+    """
+
+    def __init__(self):
+        self.rows: Dict[str, pd.DataFrame] = {}  # exercise -> its latest session's sets (LATEST_COLUMNS + session)
+        self.latest: Dict[str, Dict] = {}        # exercise -> _summaries of those sets
+
+    # --- snapshot listener ---
+    def on_reset(self, frame: pd.DataFrame):
+        self.rows, self.latest = {}, {}
+        self._merge(frame)
+
+    def on_append(self, rows: pd.DataFrame):
+        self._merge(rows)
+
+    def on_discard(self, removed: pd.DataFrame, frame: pd.DataFrame):
+        for ex, days in removed.assign(session=session_of(removed["date"])).groupby("exercise", observed=True)["session"]:
+            if ex in self.rows and self.rows[ex]["session"].iloc[0] in set(days):
+                self.rows.pop(ex), self.latest.pop(ex)
+                self._merge(frame[frame["exercise"] == ex])
+
+    def _merge(self, rows: pd.DataFrame):
+        if rows is None or rows.empty: return
+        df = rows[["exercise"] + LATEST_COLUMNS].copy()
+        df["session"] = session_of(df["date"])
+        for c in ("reps", "weight", "rir"): df[c] = pd.to_numeric(df[c], errors="coerce").astype(float)
+        df = df[(df["reps"] > 0) & df["weight"].notna()]  # timed blocks and blank sets say nothing about load
+        df = df[df["session"] == df.groupby("exercise", observed=True)["session"].transform("max")]
+        merged = []
+        for ex, part in df.groupby("exercise", observed=True):
+            old = self.rows.get(ex)
+            if old is not None:
+                if old["session"].iloc[0] > part["session"].iloc[0]: continue  # a backfilled older session
+                if old["session"].iloc[0] == part["session"].iloc[0]: part = pd.concat([old, part], ignore_index=True)
+            self.rows[ex] = part
+            merged.append(part)
+        if merged: self.latest.update(_summaries(pd.concat(merged) if len(merged) > 1 else merged[0]))
+
+    # --- lookups ---
+    def get(self, exercise: str) -> Optional[Dict]:
+        return self.latest.get(exercise)
+
+
+def next_targets(latest: LatestSessions, plan, day: str) -> pd.DataFrame:
+    """Next-session weight and rep targets for every rep-ranged block of `day`.
+
+    Double progression, decided for the whole day at once: every top set at
+    the top of the range adds a load step (two when RIR >= EASY_RIR) and
+    resets to the bottom; inside the range adds a rep (two when easy); below
+    it at RIR <= 1 drops ~5%, otherwise holds. No history gives no weight.
+    """
+    blocks = [b for b in plan.days.get(day, []) if b.get("reps")]
+    if not blocks: return pd.DataFrame(columns=TARGET_COLUMNS)
+    last = [latest.get(b["exercise"]) or {} for b in blocks]
+    lo = np.array([b["reps"][0] for b in blocks], dtype=float)
+    hi = np.array([b["reps"][1] for b in blocks], dtype=float)
+    inc = np.array([INCREMENTS.get(b["category"], DEFAULT_INCREMENT) for b in blocks])
+    w = np.array([l.get("weight", np.nan) for l in last], dtype=float)
+    r = np.array([l.get("min_reps", np.nan) for l in last], dtype=float)
+    k = np.array([np.nan if l.get("rir") is None else l["rir"] for l in last], dtype=float)
+    easy = np.nan_to_num(k, nan=0) >= EASY_RIR
+    step = np.where(easy, 2, 1)
+
+    top, below = r >= hi, r < lo
+    grind = below & (np.nan_to_num(k, nan=0) <= 1)
+    weight = np.select([top, grind], [w + step * inc, np.floor(w * DELOAD / inc) * inc], w)
+    reps = np.select([top | below, ~np.isnan(r)], [lo, np.minimum(r + step, hi)], lo)
+    note = np.select(
+        [np.isnan(w), top, grind, below],
+        ["no history — start where {lo}–{hi} leaves ~2 RIR", "top of range hit: add load", "missed the range: drop ~5%",
+         "below range: hold the load"],
+        "in range: add a rep")
+    out = pd.DataFrame({
+        "exercise": [b["exercise"] for b in blocks],
+        "last": [f"{l['weight']:g} × {l['min_reps']}" + (f"–{l['max_reps']}" if l["max_reps"] != l["min_reps"] else "")
+                 + (f" @ {l['rir']:g} RIR" if l["rir"] is not None else "") + f" ({l['date']})" if l else "—" for l in last],
+        "weight": np.where(np.isnan(w), np.nan, np.maximum(weight, 0)),
+        "reps": reps.astype(int),
+        "note": [n.format(lo=int(a), hi=int(b)) for n, a, b in zip(note, lo, hi)],
+    })
+    return out.set_index("exercise", drop=False)
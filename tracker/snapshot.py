@@ -0,0 +1,114 @@
+import time
+import pandas as pd
+from concurrent.futures import Executor
+from typing import Optional
+
+from .storage import Storage, concat_logs
+
+
+class LogSnapshot:
+    """One cached copy of the workout log per session, shared by every section.
+
+    `get()` serves the cached frame. After a write the caller marks it stale
+    with `invalidate()` (or `discard()` for a delete) and the next `get()`
+    pulls only the rows appended since the last fetch. `max_age` bounds how
+    long another device's writes can go unseen. Deltas only carry appends,
+    so an expired refresh also reads `Storage.log_stamp()` (row count and
+    max id) and reloads in full only when the frame no longer matches it,
+    i.e. rows were deleted elsewhere. `prefetch(pool)` starts the
+    fetch a refresh would make on a worker thread so it overlaps the rest
+    of the page; the next `get()` applies it.
+
+    Derived structures (see aggregates.py) subscribe to be told about
+    exactly what changed: on_reset(frame), on_append(rows) and
+    on_discard(removed_rows, frame).
+    """
+
+    def __init__(self, storage: Storage, max_age: Optional[float] = 60.0):
+        self.storage = storage
+        self.max_age = max_age
+        self.frame: Optional[pd.DataFrame] = None
+        self.cursor = None
+        self.version = 0          # bumps whenever the frame changes
+        self._stale = True
+        self._fetched_at = 0.0
+        self._listeners = []
+        self._pending = None       # (cursor, future) of a prefetched delta
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+        if self.frame is not None:
+            listener.on_reset(self.frame)
+
+    def _notify(self, event: str, *args):
+        for listener in self._listeners:
+            getattr(listener, event)(*args)
+
+    def _expired(self) -> bool:
+        return self.max_age is not None and time.monotonic() - self._fetched_at > self.max_age
+
+    def _fetch(self, cursor, probe: bool):
+        delta, cursor, full = self.storage.fetch_log_delta(cursor)
+        return delta, cursor, full, (self.storage.log_stamp() if probe else None)
+
+    def needs_refresh(self) -> bool:
+        return self.frame is None or self._stale or self._expired()
+
+    def prefetch(self, pool: Executor):
+        if self._pending is None and self.needs_refresh():
+            self._pending = (self.cursor, pool.submit(self._fetch, self.cursor, self._expired()))
+
+    def get(self, timeout: Optional[float] = None) -> pd.DataFrame:
+        """The current log; waits at most `timeout` for a prefetched delta (FetchTimeout)."""
+        if self.needs_refresh() or self._pending is not None:
+            self.refresh(timeout)
+        return self.frame
+
+    def refresh(self, timeout: Optional[float] = None):
+        pending = self._pending
+        if pending is not None and pending[0] == self.cursor:
+            try:
+                delta, next_cursor, full, stamp = pending[1].result(timeout)
+            finally:
+                if pending[1].done(): self._pending = None  # a timed-out fetch stays pending for the next get()
+        else:
+            self._pending = None
+            delta, next_cursor, full, stamp = self._fetch(self.cursor, self._expired())
+        if stamp is not None and not full and self.frame is not None and stamp != _stamp(self.frame, delta):
+            delta, next_cursor, full = self.storage.fetch_log_delta(None)  # rows deleted elsewhere
+        if full or self.frame is None:
+            self.frame = delta.reset_index(drop=True)
+            self.version += 1
+            self._notify("on_reset", self.frame)
+        elif len(delta):
+            self.frame = concat_logs([self.frame, delta])
+            self.version += 1
+            self._notify("on_append", delta)
+        self.cursor = next_cursor  # only once merged: a failed merge refetches the same rows
+        self._stale = False
+        self._fetched_at = time.monotonic()
+
+    def invalidate(self):
+        self._stale = True
+        self._pending = None  # may predate the write that invalidated us
+
+    def discard(self, set_id: int):
+        """Drop a deleted row locally; deltas only ever see appends."""
+        if self.frame is not None and "id" in self.frame.columns:
+            hit = self.frame["id"] == set_id
+            removed = self.frame[hit]
+            self.frame = self.frame[~hit].reset_index(drop=True)
+            self.version += 1
+            if len(removed): self._notify("on_discard", removed, self.frame)
+        self._stale = True
+        self._pending = None
+
+    def reset(self):
+        self.frame, self.cursor = None, None
+        self._stale, self._pending = True, None
+
+
+def _stamp(*frames: pd.DataFrame):
+    """What Storage.log_stamp() should say if `frames` together are the whole log."""
+    ids = [f["id"].max() for f in frames if len(f)]
+    return sum(len(f) for f in frames), (int(max(ids)) if ids else None)
@@ -0,0 +1,934 @@
+import gzip
+import hashlib
+import io
+import os
+import json
+import re
+import sqlite3
+import threading
+import pandas as pd
+from pandas.api.types import union_categoricals
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import DEFAULT_FORMULA, sql_1rm, with_metrics
+
+# ──────────────────────────────────────────────────────────────
+# STORAGE BACKENDS (CSV, SQLite, Supabase) — same small surface for the app
+# ──────────────────────────────────────────────────────────────
+DEFAULT_LOG_COLUMNS = [
+    "date","week","day_name","exercise","set_number","reps","weight","rir","tempo","notes","est_1rm","volume","xp"
+]
+XP_COLUMNS = ["date","task","xp","event_key"]  # event_key makes an award idempotent (NULL = legacy row)
+
+WORKOUT_TABLE = "workout_log"
+XP_TABLE = "xp_log"
+XP_SUMMARY_TABLE = "xp_summary"   # running XP total: one row per SQLite file, per user on Supabase
+EXPORT_CHUNK = 50_000             # rows per chunk when streaming the log out
+SET_KEY = ["date","exercise","set_number"]  # identity of a set for import dedup
+DEFAULT_USER = "default"          # owner of everything written before per-user partitioning
+USERS_DIR = "users"               # local partitions: users/<user>/<file>, next to the shared files
+
+# In-memory layout of the log on every read path: repeated strings as
+# categoricals, narrow (nullable) integers, `date` parsed once. Measures the
+# user reads back (weight, RIR, 1RM, volume) stay float64: float32 can't
+# hold 101.3, and the noise shows up in every table and chart.
+LOG_SCHEMA = {
+    "id": "int32", "date": "datetime64[ns]", "week": "Int16", "day_name": "category", "exercise": "category",
+    "set_number": "Int16", "reps": "Int16", "weight": "float64", "rir": "float64", "tempo": "category",
+    "notes": "category", "est_1rm": "float64", "volume": "float64", "xp": "Int16",
+}
+
+
+def _typed_column(col: pd.Series, dtype: str) -> pd.Series:
+    if col.dtype == dtype: return col
+    if dtype == "category":
+        # categories always of one text dtype, so frames from different reads
+        # concatenate: an all-NULL column (legacy rows in SQLite) would otherwise
+        # get object or float categories and new "" rows str ones
+        return col.astype("string").astype("category")
+    if dtype.startswith("datetime"):
+        if pd.api.types.is_datetime64_any_dtype(col): return col
+        # a log has few distinct dates: parse each once
+        codes, uniques = pd.factorize(col)
+        parsed = pd.DatetimeIndex(pd.to_datetime(uniques, errors="coerce", format="ISO8601"))
+        return pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT), index=col.index)
+    num = pd.to_numeric(col, errors="coerce")
+    try:
+        if dtype.startswith(("Int", "int")) and pd.api.types.is_float_dtype(num): num = num.round()
+        return num.astype(dtype)
+    except (TypeError, ValueError, OverflowError):
+        return num  # doesn't fit the narrow type: keep as parsed
+
+
+def typed_log(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` cast to LOG_SCHEMA; absent columns are skipped, extra ones pass through."""
+    return pd.DataFrame({c: _typed_column(df[c], LOG_SCHEMA[c]) if c in LOG_SCHEMA else df[c] for c in df.columns},
+                        index=df.index)
+
+
+def concat_logs(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat for typed logs: categorical columns stay categorical (categories are unioned)."""
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1: return frames[0].reset_index(drop=True)
+    cats = [c for c in frames[0].columns
+            if all(c in f.columns and isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames)]
+    out = pd.concat([f.drop(columns=cats) for f in frames], ignore_index=True)
+    for c in cats:
+        out[c] = union_categoricals([f[c] for f in frames], ignore_order=True)
+    return out[list(frames[0].columns) + [c for c in out.columns if c not in frames[0].columns]]
+
+
+def load_csv(path: str, cols: List[str]) -> pd.DataFrame:
+    if os.path.exists(path):
+        df = pd.read_csv(path)
+        for c in cols:
+            if c not in df.columns:
+                df[c] = None
+        return df
+    return pd.DataFrame(columns=cols)
+
+
+def save_csv(df: pd.DataFrame, path: str):
+    # write aside and swap in: a rewrite gets a new inode, so readers holding
+    # byte offsets into the old file can tell it from an append (_file_mark)
+    tmp = path + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _file_mark(f: BinaryIO, offset: int) -> Tuple[int, bytes]:
+    """(inode, up to 64 bytes before `offset`) of an open file: appends keep both, rewrites don't."""
+    f.seek(max(offset - 64, 0))
+    return os.fstat(f.fileno()).st_ino, f.read(min(offset, 64))
+
+
+def append_csv(rows: List[Dict], path: str, cols: List[str]):
+    """Append rows without reading the file back; keeps the existing header order."""
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "r", newline="") as f:
+            header = f.readline().strip().split(",")
+        if any(c not in header for c in cols):  # older file: widen the header once
+            save_csv(load_csv(path, cols), path)
+            header = header + [c for c in cols if c not in header]
+        pd.DataFrame(rows).reindex(columns=header).to_csv(path, mode="a", header=False, index=False)
+    else:
+        pd.DataFrame(rows).reindex(columns=cols).to_csv(path, index=False)
+
+
+def user_slug(user_id: str) -> str:
+    """Filesystem-safe folder name for a user id; a hash suffix keeps lossy slugs distinct."""
+    slug = re.sub(r"[^A-Za-z0-9_.@-]+", "_", user_id).strip("._")[:48] or "user"
+    return slug if slug == user_id else f"{slug}-{hashlib.sha1(user_id.encode()).hexdigest()[:8]}"
+
+
+def partition_path(path: str, user_id: str = DEFAULT_USER) -> str:
+    """`path` in `user_id`'s local partition (created on demand).
+
+    The default user keeps the original top-level files, so single-user
+    installs read the same data as before.
+    """
+    if user_id == DEFAULT_USER: return path
+    folder = os.path.join(os.path.dirname(path), USERS_DIR, user_slug(user_id))
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, os.path.basename(path))
+
+
+class Storage:
+    """Interface shared by every backend. `id` is the row identity used for undo.
+
+    An instance serves one user: local backends through that user's
+    partition files, Supabase by scoping every request to its user_id.
+    """
+    label = "storage"
+    defer_updates = False  # update_sets rewrites the whole log: bulk callers gather rows and call it once
+
+    def load_log(self) -> pd.DataFrame: raise NotImplementedError
+    def fetch_log_delta(self, cursor) -> Tuple[pd.DataFrame, object, bool]:
+        """Rows appended since `cursor` (None = from the start).
+
+        Returns (rows, new_cursor, full). `full` means the backend could not
+        serve a delta (history was rewritten) and `rows` is the whole log.
+        """
+        raise NotImplementedError
+    def query_log(self, exercise: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame: raise NotImplementedError
+    def recent_sets(self, limit: int, offset: int = 0) -> pd.DataFrame:
+        """Newest first: `limit` sets after skipping the `offset` most recent (id DESC)."""
+        return self.load_log().iloc[::-1].iloc[offset:offset + limit].reset_index(drop=True)
+    def iter_log(self, chunk_size: int = EXPORT_CHUNK, exercise=None, start=None, end=None) -> Iterator[pd.DataFrame]:
+        """The (filtered) log in id order, at most `chunk_size` rows at a time."""
+        yield self.query_log(exercise, start, end)
+    def append_sets(self, rows: List[Dict]): raise NotImplementedError
+    def log_keys(self, dates: List[str]) -> pd.DataFrame:
+        """id + SET_KEY of every stored set on one of `dates` (ISO strings); read by imports to dedup."""
+        raise NotImplementedError
+    def update_sets(self, rows: List[Dict]) -> int:
+        """Overwrite stored sets in place; each row carries the `id` it replaces. Returns rows updated."""
+        raise NotImplementedError
+    def last_set_id(self) -> Optional[int]: raise NotImplementedError
+    def log_stamp(self) -> Optional[Tuple[int, Optional[int]]]:
+        """(row count, max id) of the stored log in one cheap read, or None if deltas already see rewrites.
+
+        Deltas only carry appends; LogSnapshot compares this against its frame
+        on expiry to notice rows deleted or rewritten elsewhere.
+        """
+        return None
+    def delete_set(self, set_id: int) -> bool: raise NotImplementedError
+    def backfill_metrics(self, formula: str = DEFAULT_FORMULA) -> int:
+        """Recompute est_1rm/volume for every stored set in bulk; returns rows updated."""
+        raise NotImplementedError
+    def load_xp(self) -> pd.DataFrame: raise NotImplementedError
+    def append_xp(self, row: Dict) -> bool:
+        """Record an award; a row whose event_key is already stored is a no-op (returns False)."""
+        raise NotImplementedError
+    def compact_xp(self, dry_run: bool = False) -> int:
+        """Collapse duplicate legacy check-off awards; returns rows removed."""
+        raise NotImplementedError
+    def write_batch(self, sets: List[Dict], xp: List[Dict]):
+        """Write queued sets and XP awards together (see writeback.py)."""
+        self.append_sets(sets)
+        for row in xp: self.append_xp(row)
+    def permanent_error(self, e: Exception) -> bool:
+        """True if retrying the write that raised `e` can't succeed (bad data, schema), so the queue sets it aside."""
+        return isinstance(e, (TypeError, ValueError, KeyError))
+    def total_xp(self) -> int: raise NotImplementedError
+    def reconcile_xp(self) -> Tuple[int, int]:
+        """Recompute the XP total from the ledger; returns (stored_total, true_total)."""
+        raise NotImplementedError
+
+
+def _filter_frame(df: pd.DataFrame, exercise=None, start=None, end=None) -> pd.DataFrame:
+    if exercise is not None: df = df[df["exercise"] == exercise]
+    if start is None and end is None: return df
+    # typed frames compare datetimes; raw ones compare ISO date strings
+    typed = pd.api.types.is_datetime64_any_dtype(df["date"])
+    dates, conv = (df["date"], pd.Timestamp) if typed else (df["date"].astype(str), str)
+    keep = pd.Series(True, index=df.index)
+    if start is not None: keep &= dates >= conv(str(start))
+    if end is not None: keep &= dates <= conv(str(end))
+    return df[keep]
+
+
+def _key_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` reduced to id + SET_KEY with comparable dtypes (date and exercise text, set_number Int64)."""
+    if df.empty: return pd.DataFrame({"id": pd.Series(dtype="int64"), "date": pd.Series(dtype=str),
+                                      "exercise": pd.Series(dtype=str), "set_number": pd.Series(dtype="Int64")})
+    return pd.DataFrame({"id": df["id"].astype("int64"), "date": df["date"].astype(str).str[:10],
+                         "exercise": df["exercise"].astype(str),
+                         "set_number": pd.to_numeric(df["set_number"], errors="coerce").round().astype("Int64")})
+
+
+def _legacy_duplicates(xp: pd.DataFrame) -> pd.Series:
+    """Mask of repeat check-off awards written before event keys existed.
+
+    Reruns with a ticked checkbox appended identical (date, task, xp) rows;
+    the first of each group is kept. "<exercise> sets" awards are left alone
+    since saving the same sets twice a day is legitimate.
+    """
+    if xp.empty: return pd.Series(False, index=xp.index)
+    legacy = xp["event_key"].isna() & ~xp["task"].astype(str).str.endswith(" sets")
+    return legacy & xp[legacy].duplicated(["date", "task", "xp"]).reindex(xp.index, fill_value=False)
+
+
+def write_csv_export(storage: Storage, out: BinaryIO, exercise=None, start=None, end=None,
+                     compress: bool = False, chunk_size: int = EXPORT_CHUNK) -> int:
+    """Stream the (filtered) log to `out` as CSV, chunk by chunk; gzip with `compress`.
+
+    Only one chunk is in memory at a time. Returns the number of rows written.
+    """
+    sink = gzip.GzipFile(fileobj=out, mode="wb") if compress else out
+    cols, n = None, 0
+    try:
+        for chunk in storage.iter_log(chunk_size, exercise, start, end):
+            if cols is None:
+                known = ["id"] + DEFAULT_LOG_COLUMNS
+                cols = [c for c in known if c in chunk.columns] + [c for c in chunk.columns if c not in known]
+            sink.write(chunk.reindex(columns=cols).to_csv(index=False, header=n == 0).encode())
+            n += len(chunk)
+        if cols is None:
+            sink.write((",".join(["id"] + DEFAULT_LOG_COLUMNS) + "\n").encode())
+    finally:
+        if compress: sink.close()
+    return n
+
+
+# --- CSV (legacy layout; ids are 1-based row positions) ---
+class CsvStorage(Storage):
+    label = "CSV"
+    defer_updates = True
+
+    def __init__(self, log_path: str, xp_path: str):
+        self.log_path = log_path
+        self.xp_path = xp_path
+        self.total_path = os.path.splitext(xp_path)[0] + ".total.json"
+        self._keys, self._keys_size = set(), -1  # event keys seen in the ledger, stamped with its size
+        self._lines = (0, 0, None)  # (bytes counted, newlines in them, _file_mark at that offset)
+        self._set_keys = (None, _key_frame(pd.DataFrame()))  # (delta cursor, id + SET_KEY of the rows before it)
+
+    def load_log(self) -> pd.DataFrame:
+        df = load_csv(self.log_path, DEFAULT_LOG_COLUMNS)
+        df.insert(0, "id", range(1, len(df) + 1))
+        return typed_log(df)
+
+    def fetch_log_delta(self, cursor) -> Tuple[pd.DataFrame, object, bool]:
+        # cursor = (byte offset of the first unread line, next row id, header, file mark at the offset);
+        # a mark that no longer matches means the file was rewritten (recompute, import updates,
+        # Undo here or in another session), so the offset is meaningless and the log reloads in full
+        if not os.path.exists(self.log_path):
+            return typed_log(pd.DataFrame(columns=["id"] + DEFAULT_LOG_COLUMNS)), None, True
+        with open(self.log_path, "rb") as f:  # one handle: a concurrent replace can't mix two files
+            full = cursor is None or _file_mark(f, cursor[0]) != cursor[3]
+            if not full and f.seek(0, os.SEEK_END) == cursor[0]:
+                return typed_log(pd.DataFrame(columns=["id"] + DEFAULT_LOG_COLUMNS)), cursor, False
+            offset, next_id, header = (0, 1, None) if full else cursor[:3]
+            f.seek(offset)
+            chunk = f.read()
+            chunk = chunk[:chunk.rfind(b"\n") + 1]  # leave a half-written last line for next time
+            mark = _file_mark(f, offset + len(chunk))
+        if header is None:
+            first = chunk.find(b"\n") + 1
+            header = chunk[:first].decode().strip().split(",") if first else DEFAULT_LOG_COLUMNS
+            offset, chunk = offset + first, chunk[first:]
+        df = pd.read_csv(io.BytesIO(chunk), header=None, names=header) if chunk.strip() else pd.DataFrame(columns=header)
+        for c in DEFAULT_LOG_COLUMNS:
+            if c not in df.columns: df[c] = None
+        df.insert(0, "id", range(next_id, next_id + len(df)))
+        return typed_log(df), (offset + len(chunk), next_id + len(df), header, mark), full
+
+    def query_log(self, exercise=None, start=None, end=None) -> pd.DataFrame:
+        return _filter_frame(self.load_log(), exercise, start, end)
+
+    def _row_count(self) -> int:
+        # appends only add lines, so count the new bytes; a rewrite anywhere (mark mismatch) recounts
+        if not os.path.exists(self.log_path): return 0
+        with open(self.log_path, "rb") as f:
+            known, lines, mark = self._lines
+            if _file_mark(f, known) != mark: known, lines = 0, 0
+            f.seek(known)
+            lines += sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+            end = f.tell()
+            self._lines = (end, lines, _file_mark(f, end))
+        return max(lines - 1, 0)  # minus header
+
+    def recent_sets(self, limit: int, offset: int = 0) -> pd.DataFrame:
+        # read backwards from the end of the file until enough lines are in hand
+        n = self._row_count()
+        want = min(offset + limit, n)
+        if want <= offset: return pd.DataFrame(columns=["id"] + DEFAULT_LOG_COLUMNS)
+        with open(self.log_path, "rb") as f:
+            header = f.readline()
+            f.seek(0, os.SEEK_END)
+            pos, buf = f.tell(), b""
+            while pos > len(header) and buf.count(b"\n") <= want:
+                step = min(1 << 16, pos - len(header))
+                pos -= step; f.seek(pos)
+                buf = f.read(step) + buf
+        lines = buf.splitlines()[-want:]  # a partial first line falls off the front
+        page = lines[:len(lines) - offset]
+        df = pd.read_csv(io.BytesIO(header + b"\n".join(page) + b"\n"))
+        for c in DEFAULT_LOG_COLUMNS:
+            if c not in df.columns: df[c] = None
+        df.insert(0, "id", range(n - want + 1, n - want + 1 + len(df)))
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def iter_log(self, chunk_size: int = EXPORT_CHUNK, exercise=None, start=None, end=None) -> Iterator[pd.DataFrame]:
+        if not os.path.exists(self.log_path): return
+        next_id = 1
+        for chunk in pd.read_csv(self.log_path, chunksize=chunk_size):
+            for c in DEFAULT_LOG_COLUMNS:
+                if c not in chunk.columns: chunk[c] = None
+            chunk.insert(0, "id", range(next_id, next_id + len(chunk)))
+            next_id += len(chunk)
+            chunk = _filter_frame(chunk, exercise, start, end)
+            if len(chunk): yield chunk
+
+    def append_sets(self, rows: List[Dict]):
+        if rows: append_csv(rows, self.log_path, DEFAULT_LOG_COLUMNS)
+
+    def log_keys(self, dates: List[str]) -> pd.DataFrame:
+        # an import asks once per chunk: keep every row's key and read only the bytes
+        # appended since (its own writes); a rewrite makes the delta start over
+        cursor, keys = self._set_keys
+        delta, cursor, full = self.fetch_log_delta(cursor)
+        if full: keys = _key_frame(delta)
+        elif len(delta): keys = pd.concat([keys, _key_frame(delta)], ignore_index=True)
+        self._set_keys = (cursor, keys)
+        return keys[keys["date"].isin(set(dates))]
+
+    def update_sets(self, rows: List[Dict]) -> int:
+        if not rows: return 0
+        df = load_csv(self.log_path, DEFAULT_LOG_COLUMNS)
+        pos = [int(r["id"]) - 1 for r in rows]
+        cols = [c for c in DEFAULT_LOG_COLUMNS if c in df.columns]
+        df = df.astype({c: object for c in cols})
+        df.iloc[pos, [df.columns.get_loc(c) for c in cols]] = [[r.get(c) for c in cols] for r in rows]
+        save_csv(df, self.log_path)
+        self._lines = (0, 0, None)
+        return len(rows)
+
+    def last_set_id(self) -> Optional[int]:
+        return self._row_count() or None
+
+    def delete_set(self, set_id: int) -> bool:
+        df = load_csv(self.log_path, DEFAULT_LOG_COLUMNS)
+        if not 1 <= set_id <= len(df): return False
+        save_csv(df.drop(index=df.index[set_id - 1]), self.log_path)
+        self._lines = (0, 0, None)
+        return True
+
+    def backfill_metrics(self, formula: str = DEFAULT_FORMULA) -> int:
+        df = load_csv(self.log_path, DEFAULT_LOG_COLUMNS)
+        if not df.empty: save_csv(with_metrics(df, formula), self.log_path)
+        self._lines = (0, 0, None)
+        return len(df)
+
+    def load_xp(self) -> pd.DataFrame:
+        return load_csv(self.xp_path, XP_COLUMNS)
+
+    def _event_keys(self) -> set:
+        size = os.path.getsize(self.xp_path) if os.path.exists(self.xp_path) else 0
+        if size != self._keys_size:
+            self._keys = set(self.load_xp()["event_key"].dropna().astype(str)) if size else set()
+            self._keys_size = size
+        return self._keys
+
+    def append_xp(self, row: Dict) -> bool:
+        key = row.get("event_key")
+        if key is not None and key in self._event_keys(): return False
+        cached = self._read_total()
+        append_csv([row], self.xp_path, XP_COLUMNS)
+        if cached is not None:
+            self._write_total(cached + int(row["xp"]))
+        if key is not None:
+            self._keys.add(key); self._keys_size = os.path.getsize(self.xp_path)
+        return True
+
+    def write_batch(self, sets: List[Dict], xp: List[Dict]):
+        # one append per file, however many awards the batch carries
+        self.append_sets(sets)
+        keys, fresh, seen = self._event_keys(), [], set()
+        for row in xp:
+            key = row.get("event_key")
+            if key is not None and (key in keys or key in seen): continue
+            if key is not None: seen.add(key)
+            fresh.append(row)
+        if not fresh: return
+        cached = self._read_total()
+        append_csv(fresh, self.xp_path, XP_COLUMNS)
+        if cached is not None:
+            self._write_total(cached + sum(int(r["xp"]) for r in fresh))
+        self._keys |= seen; self._keys_size = os.path.getsize(self.xp_path)
+
+    def compact_xp(self, dry_run: bool = False) -> int:
+        df = self.load_xp()
+        keep = ~_legacy_duplicates(df)
+        removed = int((~keep).sum())
+        if removed and not dry_run:
+            save_csv(df[keep], self.xp_path)
+            self.reconcile_xp()
+        return removed
+
+    # The running total lives in a sidecar next to the ledger, stamped with the
+    # ledger's size; any out-of-band edit changes the size and forces a recount.
+    def _read_total(self) -> Optional[int]:
+        try:
+            with open(self.total_path) as f:
+                meta = json.load(f)
+            size = os.path.getsize(self.xp_path) if os.path.exists(self.xp_path) else 0
+            return int(meta["total"]) if meta.get("size") == size else None
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_total(self, total: int):
+        size = os.path.getsize(self.xp_path) if os.path.exists(self.xp_path) else 0
+        with open(self.total_path, "w") as f:
+            json.dump({"total": int(total), "size": size}, f)
+
+    def _sum_ledger(self) -> int:
+        df = self.load_xp()
+        return int(pd.to_numeric(df["xp"], errors="coerce").sum()) if not df.empty else 0
+
+    def total_xp(self) -> int:
+        cached = self._read_total()
+        if cached is not None: return cached
+        total = self._sum_ledger()
+        self._write_total(total)
+        return total
+
+    def reconcile_xp(self) -> Tuple[int, int]:
+        try:
+            with open(self.total_path) as f:
+                stored = int(json.load(f)["total"])
+        except (OSError, ValueError, KeyError):
+            stored = 0
+        total = self._sum_ledger()
+        self._write_total(total)
+        return stored, total
+
+
+# --- SQLite (embedded, WAL, indexed; one connection per thread) ---
+SQLITE_SCHEMA = """
+create table if not exists workout_log (
+  id integer primary key autoincrement,
+  date text,
+  week integer,
+  day_name text,
+  exercise text,
+  set_number integer,
+  reps integer,
+  weight real,
+  rir real,
+  tempo text,
+  notes text,
+  est_1rm real,
+  volume real,
+  xp integer
+);
+create index if not exists idx_workout_log_exercise_date on workout_log(exercise, date);
+create index if not exists idx_workout_log_date on workout_log(date);
+
+create table if not exists xp_log (
+  id integer primary key autoincrement,
+  date text,
+  task text,
+  xp integer,
+  event_key text
+);
+create index if not exists idx_xp_log_date on xp_log(date);
+
+create table if not exists xp_summary (
+  id integer primary key check (id = 1),
+  total integer not null
+);
+insert or ignore into xp_summary (id, total) select 1, coalesce(sum(xp), 0) from xp_log;
+create trigger if not exists trg_xp_log_insert after insert on xp_log begin
+  update xp_summary set total = total + coalesce(new.xp, 0) where id = 1;
+end;
+create trigger if not exists trg_xp_log_delete after delete on xp_log begin
+  update xp_summary set total = total - coalesce(old.xp, 0) where id = 1;
+end;
+create trigger if not exists trg_xp_log_update after update of xp on xp_log begin
+  update xp_summary set total = total - coalesce(old.xp, 0) + coalesce(new.xp, 0) where id = 1;
+end;
+"""
+
+
+class SqliteStorage(Storage):
+    label = "SQLite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as con:
+            con.executescript(SQLITE_SCHEMA)
+            # databases created before event keys: add the column, then the unique index
+            if "event_key" not in {r[1] for r in con.execute(f"pragma table_info({XP_TABLE})")}:
+                con.execute(f"alter table {XP_TABLE} add column event_key text")
+            con.execute(f"create unique index if not exists idx_xp_log_event_key on {XP_TABLE}(event_key)")
+
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=10)
+            con.execute("pragma journal_mode=wal")
+            con.execute("pragma synchronous=normal")
+            self._local.con = con
+        return con
+
+    def _read(self, sql: str, params=()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self._conn(), params=params)
+
+    def load_log(self) -> pd.DataFrame:
+        return typed_log(self._read(f"select * from {WORKOUT_TABLE} order by id"))
+
+    def fetch_log_delta(self, cursor) -> Tuple[pd.DataFrame, object, bool]:
+        df = typed_log(self._read(f"select * from {WORKOUT_TABLE} where id > ? order by id", (int(cursor or 0),)))
+        return df, (int(df["id"].iloc[-1]) if len(df) else cursor), cursor is None
+
+    @staticmethod
+    def _where(exercise=None, start=None, end=None) -> Tuple[List[str], List]:
+        where, params = [], []
+        if exercise is not None: where.append("exercise = ?"); params.append(exercise)
+        if start is not None: where.append("date >= ?"); params.append(str(start))
+        if end is not None: where.append("date <= ?"); params.append(str(end))
+        return where, params
+
+    def query_log(self, exercise=None, start=None, end=None) -> pd.DataFrame:
+        where, params = self._where(exercise, start, end)
+        clause = f" where {' and '.join(where)}" if where else ""
+        return typed_log(self._read(f"select * from {WORKOUT_TABLE}{clause} order by id", params))
+
+    def recent_sets(self, limit: int, offset: int = 0) -> pd.DataFrame:
+        return self._read(f"select * from {WORKOUT_TABLE} order by id desc limit ? offset ?", (int(limit), int(offset)))
+
+    def iter_log(self, chunk_size: int = EXPORT_CHUNK, exercise=None, start=None, end=None) -> Iterator[pd.DataFrame]:
+        # keyset pagination on id, so each chunk is an index range scan
+        where, params = self._where(exercise, start, end)
+        sql = f"select * from {WORKOUT_TABLE} where {' and '.join(['id > ?'] + where)} order by id limit ?"
+        after = 0
+        while True:
+            df = self._read(sql, [after] + params + [int(chunk_size)])
+            if len(df): yield df
+            if len(df) < chunk_size: return
+            after = int(df["id"].iloc[-1])
+
+    @staticmethod
+    def _insert_sets(con: sqlite3.Connection, rows: List[Dict]):
+        cols = ",".join(DEFAULT_LOG_COLUMNS); marks = ",".join("?" * len(DEFAULT_LOG_COLUMNS))
+        con.executemany(f"insert into {WORKOUT_TABLE} ({cols}) values ({marks})",
+                        [tuple(r.get(c) for c in DEFAULT_LOG_COLUMNS) for r in rows])
+
+    @staticmethod
+    def _insert_xp(con: sqlite3.Connection, row: Dict) -> bool:
+        return con.execute(f"insert or ignore into {XP_TABLE} (date, task, xp, event_key) values (?, ?, ?, ?)",
+                           (row["date"], row["task"], int(row["xp"]), row.get("event_key"))).rowcount > 0
+
+    def append_sets(self, rows: List[Dict]):
+        if not rows: return
+        with self._conn() as con:
+            self._insert_sets(con, rows)
+
+    def log_keys(self, dates: List[str]) -> pd.DataFrame:
+        parts = [self._read(f"select id, date, exercise, set_number from {WORKOUT_TABLE} "
+                            f"where date in ({','.join('?' * len(dates[i:i + 500]))})", dates[i:i + 500])
+                 for i in range(0, len(dates), 500)]
+        return _key_frame(pd.concat(parts, ignore_index=True) if parts else pd.DataFrame())
+
+    def update_sets(self, rows: List[Dict]) -> int:
+        if not rows: return 0
+        assign = ", ".join(f"{c} = ?" for c in DEFAULT_LOG_COLUMNS)
+        with self._conn() as con:
+            return con.executemany(f"update {WORKOUT_TABLE} set {assign} where id = ?",
+                                   [tuple(r.get(c) for c in DEFAULT_LOG_COLUMNS) + (int(r["id"]),) for r in rows]).rowcount
+
+    def last_set_id(self) -> Optional[int]:
+        row = self._conn().execute(f"select max(id) from {WORKOUT_TABLE}").fetchone()
+        return row[0] if row else None
+
+    def log_stamp(self) -> Optional[Tuple[int, Optional[int]]]:
+        count, top = self._conn().execute(f"select count(*), max(id) from {WORKOUT_TABLE}").fetchone()
+        return count, top
+
+    def delete_set(self, set_id: int) -> bool:
+        with self._conn() as con:
+            return con.execute(f"delete from {WORKOUT_TABLE} where id = ?", (int(set_id),)).rowcount > 0
+
+    def backfill_metrics(self, formula: str = DEFAULT_FORMULA) -> int:
+        # One UPDATE computed by SQLite itself; falls back to the numpy path
+        # when the build lacks math functions (pow, used by Lombardi).
+        try:
+            with self._conn() as con:
+                return con.execute(f"update {WORKOUT_TABLE} set est_1rm = {sql_1rm(formula)}, "
+                                   f"volume = coalesce(reps, 0) * coalesce(weight, 0)").rowcount
+        except sqlite3.OperationalError:
+            pass
+        df = with_metrics(self._read(f"select id, reps, weight, rir from {WORKOUT_TABLE}"), formula)
+        with self._conn() as con:
+            con.executemany(f"update {WORKOUT_TABLE} set est_1rm = ?, volume = ? where id = ?",
+                            zip(df["est_1rm"].tolist(), df["volume"].tolist(), df["id"].tolist()))
+        return len(df)
+
+    def load_xp(self) -> pd.DataFrame:
+        return self._read(f"select * from {XP_TABLE} order by id")
+
+    def write_batch(self, sets: List[Dict], xp: List[Dict]):
+        with self._conn() as con:  # one transaction for the whole batch
+            if sets: self._insert_sets(con, sets)
+            for row in xp: self._insert_xp(con, row)
+
+    def permanent_error(self, e: Exception) -> bool:
+        # OperationalError (locked, disk full) may clear up; these won't
+        return super().permanent_error(e) or isinstance(e, (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError))
+
+    def append_xp(self, row: Dict) -> bool:
+        with self._conn() as con:
+            return self._insert_xp(con, row)
+
+    def compact_xp(self, dry_run: bool = False) -> int:
+        xp = self.load_xp()
+        ids = xp.loc[_legacy_duplicates(xp), "id"].tolist()
+        if ids and not dry_run:
+            with self._conn() as con:
+                con.executemany(f"delete from {XP_TABLE} where id = ?", [(int(i),) for i in ids])
+        return len(ids)
+
+    def total_xp(self) -> int:
+        return int(self._conn().execute(f"select total from {XP_SUMMARY_TABLE} where id = 1").fetchone()[0])
+
+    def reconcile_xp(self) -> Tuple[int, int]:
+        with self._conn() as con:
+            stored = con.execute(f"select total from {XP_SUMMARY_TABLE} where id = 1").fetchone()[0]
+            total = con.execute(f"select coalesce(sum(xp), 0) from {XP_TABLE}").fetchone()[0]
+            con.execute(f"update {XP_SUMMARY_TABLE} set total = ? where id = 1", (total,))
+        return int(stored), int(total)
+
+
+def migrate_csv_to_sqlite(log_path: str, xp_path: str, db_path: str, force: bool = False) -> Dict[str, int]:
+    """One-shot copy of the legacy CSV files into a SQLite database.
+
+    Refuses to run against a database that already holds rows unless `force`.
+    """
+    store = SqliteStorage(db_path)
+    con = store._conn()
+    existing = con.execute(f"select (select count(*) from {WORKOUT_TABLE}) + (select count(*) from {XP_TABLE})").fetchone()[0]
+    if existing and not force:
+        raise RuntimeError(f"{db_path} already has {existing} rows; pass force=True to append anyway")
+    log = load_csv(log_path, DEFAULT_LOG_COLUMNS)[DEFAULT_LOG_COLUMNS]
+    xp = load_csv(xp_path, XP_COLUMNS)[XP_COLUMNS]
+    with con:
+        log.to_sql(WORKOUT_TABLE, con, if_exists="append", index=False)
+        xp.to_sql(XP_TABLE, con, if_exists="append", index=False)
+    return {"sets": len(log), "xp": len(xp)}
+
+
+# --- Supabase (postgres over HTTP; client created by the app) ---
+SUPABASE_SCHEMA = """create table if not exists workout_log (
+  id bigserial primary key,
+  user_id text not null default 'default',
+  date text,
+  week int,
+  day_name text,
+  exercise text,
+  set_number int,
+  reps int,
+  weight float8,
+  rir float8,
+  tempo text,
+  notes text,
+  est_1rm float8,
+  volume float8,
+  xp int,
+  batch_id text
+);
+
+create table if not exists xp_log (
+  id bigserial primary key,
+  user_id text not null default 'default',
+  date text,
+  task text,
+  xp int,
+  event_key text
+);
+
+-- projects created before per-user partitioning: existing rows belong to 'default'
+alter table workout_log add column if not exists user_id text not null default 'default';
+alter table xp_log add column if not exists user_id text not null default 'default';
+alter table xp_log add column if not exists event_key text;
+-- queued saves carry a client id per Save, so a retried or replayed batch can't insert its sets twice
+alter table workout_log add column if not exists batch_id text;
+alter table xp_log drop constraint if exists xp_log_event_key_key;
+
+-- every read is scoped to one user: keyset pages walk (user_id, id),
+-- filtered reads use (user_id, exercise, date)
+create index if not exists idx_workout_log_user_id on workout_log(user_id, id);
+create index if not exists idx_workout_log_user_exercise_date on workout_log(user_id, exercise, date);
+create index if not exists idx_xp_log_user_id on xp_log(user_id, id);
+create unique index if not exists idx_xp_log_user_event_key on xp_log(user_id, event_key);
+create unique index if not exists idx_workout_log_user_batch_set on workout_log(user_id, batch_id, set_number);
+
+-- running XP total per user, maintained on every ledger write
+create table if not exists xp_summary (
+  user_id text primary key,
+  total bigint not null default 0
+);
+-- older projects kept one global row (id = 1): it becomes the default user's
+alter table xp_summary add column if not exists user_id text;
+update xp_summary set user_id = 'default' where user_id is null;
+alter table xp_summary drop column if exists id;
+do $$ begin
+  if not exists (select 1 from pg_constraint where conrelid = 'xp_summary'::regclass and contype = 'p') then
+    alter table xp_summary add primary key (user_id);
+  end if;
+end $$;
+insert into xp_summary (user_id, total)
+  select user_id, coalesce(sum(xp), 0) from xp_log group by user_id
+  on conflict (user_id) do nothing;
+
+create or replace function xp_summary_apply() returns trigger as $$
+begin
+  if tg_op in ('DELETE', 'UPDATE') then
+    update xp_summary set total = total - coalesce(old.xp, 0) where user_id = old.user_id;
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    insert into xp_summary (user_id, total) values (new.user_id, coalesce(new.xp, 0))
+      on conflict (user_id) do update set total = xp_summary.total + excluded.total;
+  end if;
+  return null;
+end $$ language plpgsql;
+
+drop trigger if exists trg_xp_summary on xp_log;
+create trigger trg_xp_summary after insert or update of xp, user_id or delete on xp_log
+  for each row execute function xp_summary_apply();
+
+-- sets + XP in one round trip / one transaction (used by the write-behind queue)
+create or replace function log_batch(sets jsonb, xp jsonb) returns void as $$
+begin
+  insert into workout_log (user_id, date, week, day_name, exercise, set_number, reps, weight, rir, tempo, notes, est_1rm, volume, xp, batch_id)
+    select user_id, date, week, day_name, exercise, set_number, reps, weight, rir, tempo, notes, est_1rm, volume, xp, batch_id
+    from jsonb_populate_recordset(null::workout_log, sets)
+    on conflict (user_id, batch_id, set_number) do nothing;
+  insert into xp_log (user_id, date, task, xp, event_key)
+    select user_id, date, task, xp, event_key from jsonb_populate_recordset(null::xp_log, xp)
+    on conflict (user_id, event_key) do nothing;
+end $$ language plpgsql;
+"""
+
+
+class SupabaseStorage(Storage):
+    label = "Supabase"
+
+    PAGE = 1000  # PostgREST caps a single response at 1000 rows by default
+    LOG_SELECT = ",".join(["id"] + DEFAULT_LOG_COLUMNS)
+    XP_SELECT = ",".join(["id"] + XP_COLUMNS)
+
+    def __init__(self, client, user_id: str = DEFAULT_USER):
+        self.client = client
+        self.user_id = user_id
+
+    def _select(self, table: str, columns: str = None):
+        columns = columns or (self.LOG_SELECT if table == WORKOUT_TABLE else self.XP_SELECT)
+        return self.client.table(table).select(columns).eq("user_id", self.user_id)
+
+    def _own(self, rows: List[Dict]) -> List[Dict]:
+        return [dict(r, user_id=self.user_id) for r in rows]
+
+    def _pages(self, table: str, after_id: int = 0, exercise=None, start=None, end=None,
+               columns: str = None, dates: List[str] = None) -> Iterator[List[Dict]]:
+        # keyset pagination on (user_id, id)
+        while True:
+            q = self._select(table, columns).gt("id", after_id)
+            if exercise is not None: q = q.eq("exercise", exercise)
+            if dates is not None: q = q.in_("date", dates)
+            if start is not None: q = q.gte("date", str(start))
+            if end is not None: q = q.lte("date", str(end))
+            page = q.order("id").limit(self.PAGE).execute().data or []
+            if page: yield page
+            if len(page) < self.PAGE: return
+            after_id = page[-1]["id"]
+
+    def _rows_after(self, table: str, after_id: int) -> List[Dict]:
+        return [r for page in self._pages(table, after_id) for r in page]
+
+    def _frame(self, rows: List[Dict]) -> pd.DataFrame:
+        return typed_log(pd.DataFrame(rows) if rows else pd.DataFrame(columns=["id"] + DEFAULT_LOG_COLUMNS))
+
+    def load_log(self) -> pd.DataFrame:
+        return self._frame(self._rows_after(WORKOUT_TABLE, 0))
+
+    def fetch_log_delta(self, cursor) -> Tuple[pd.DataFrame, object, bool]:
+        df = self._frame(self._rows_after(WORKOUT_TABLE, int(cursor or 0)))
+        return df, (int(df["id"].iloc[-1]) if len(df) else cursor), cursor is None
+
+    def query_log(self, exercise=None, start=None, end=None) -> pd.DataFrame:
+        return self._frame([r for page in self._pages(WORKOUT_TABLE, 0, exercise, start, end) for r in page])
+
+    def recent_sets(self, limit: int, offset: int = 0) -> pd.DataFrame:
+        res = self._select(WORKOUT_TABLE).order("id", desc=True).range(offset, offset + limit - 1).execute()
+        return pd.DataFrame(res.data) if res.data else pd.DataFrame(columns=["id"] + DEFAULT_LOG_COLUMNS)
+
+    def iter_log(self, chunk_size: int = EXPORT_CHUNK, exercise=None, start=None, end=None) -> Iterator[pd.DataFrame]:
+        buf = []
+        for page in self._pages(WORKOUT_TABLE, 0, exercise, start, end):
+            buf.extend(page)
+            if len(buf) >= chunk_size:
+                yield pd.DataFrame(buf); buf = []
+        if buf: yield pd.DataFrame(buf)
+
+    def append_sets(self, rows: List[Dict]):
+        if rows: self.client.table(WORKOUT_TABLE).insert(self._own(rows)).execute()
+
+    def log_keys(self, dates: List[str]) -> pd.DataFrame:
+        rows = [r for i in range(0, len(dates), 100)  # keeps the in.(...) filter well inside URL limits
+                for page in self._pages(WORKOUT_TABLE, columns="id,date,exercise,set_number", dates=dates[i:i + 100])
+                for r in page]
+        return _key_frame(pd.DataFrame(rows))
+
+    def update_sets(self, rows: List[Dict]) -> int:
+        rows = self._own(rows)
+        for i in range(0, len(rows), self.PAGE):
+            self.client.table(WORKOUT_TABLE).upsert(rows[i:i + self.PAGE]).execute()
+        return len(rows)
+
+    def last_set_id(self) -> Optional[int]:
+        data = self._select(WORKOUT_TABLE, "id").order("id", desc=True).limit(1).execute().data
+        return int(data[0]["id"]) if data else None
+
+    def log_stamp(self) -> Optional[Tuple[int, Optional[int]]]:
+        # one request: the newest id, with the exact row count in the response header
+        res = (self.client.table(WORKOUT_TABLE).select("id", count="exact").eq("user_id", self.user_id)
+               .order("id", desc=True).limit(1).execute())
+        return int(res.count or 0), (int(res.data[0]["id"]) if res.data else None)
+
+    def delete_set(self, set_id: int) -> bool:
+        return bool(self.client.table(WORKOUT_TABLE).delete().eq("user_id", self.user_id).eq("id", int(set_id)).execute().data)
+
+    def backfill_metrics(self, formula: str = DEFAULT_FORMULA) -> int:
+        df = self.load_log()
+        if df.empty: return 0
+        df = with_metrics(df, formula)[["id", "est_1rm", "volume"]]
+        records = self._own(df.to_dict("records"))
+        for i in range(0, len(records), self.PAGE):
+            self.client.table(WORKOUT_TABLE).upsert(records[i:i + self.PAGE]).execute()
+        return len(df)
+
+    def load_xp(self) -> pd.DataFrame:
+        return pd.DataFrame(self._rows_after(XP_TABLE, 0), columns=["id"] + XP_COLUMNS)
+
+    def append_xp(self, row: Dict) -> bool:
+        row = dict(row, user_id=self.user_id)
+        if row.get("event_key") is None:
+            self.client.table(XP_TABLE).insert(row).execute()
+            return True
+        res = self.client.table(XP_TABLE).upsert(row, on_conflict="user_id,event_key", ignore_duplicates=True).execute()
+        return bool(res.data)
+
+    def write_batch(self, sets: List[Dict], xp: List[Dict]):
+        # log_batch (see SUPABASE_SCHEMA) does both inserts in one request and
+        # one transaction; projects without it fall back to two requests.
+        sets, xp = self._own(sets), self._own(xp)
+        try:
+            self.client.rpc("log_batch", {"sets": sets, "xp": xp}).execute()
+            return
+        except Exception as e:
+            if "log_batch" not in str(e): raise
+        keyed = [r for r in sets if r.get("batch_id")]
+        plain = [r for r in sets if not r.get("batch_id")]
+        if keyed: self.client.table(WORKOUT_TABLE).upsert(keyed, on_conflict="user_id,batch_id,set_number", ignore_duplicates=True).execute()
+        if plain: self.client.table(WORKOUT_TABLE).insert(plain).execute()
+        if xp: self.client.table(XP_TABLE).upsert(xp, on_conflict="user_id,event_key", ignore_duplicates=True).execute()
+
+    def permanent_error(self, e: Exception) -> bool:
+        # PostgREST passes the SQLSTATE through (22 data, 23 integrity, 42 schema)
+        # and uses PGRST1xx/2xx for malformed requests; timeouts, connection and
+        # 5xx errors carry none of these and are worth retrying.
+        code = str(getattr(e, "code", "") or "")
+        return isinstance(e, TypeError) or code[:2] in ("22", "23", "42") or code.startswith(("PGRST1", "PGRST2"))
+
+    def compact_xp(self, dry_run: bool = False) -> int:
+        xp = self.load_xp()
+        if xp.empty: return 0
+        if "event_key" not in xp.columns: xp["event_key"] = None
+        ids = xp.loc[_legacy_duplicates(xp), "id"].tolist()
+        if not dry_run:
+            for i in range(0, len(ids), self.PAGE):
+                self.client.table(XP_TABLE).delete().eq("user_id", self.user_id).in_("id", ids[i:i + self.PAGE]).execute()
+        return len(ids)
+
+    def _sum_ledger(self) -> int:
+        return int(sum(r.get("xp") or 0 for page in self._pages(XP_TABLE, columns="id,xp") for r in page))
+
+    def total_xp(self) -> int:
+        # xp_summary is kept current by a trigger (see SUPABASE_SCHEMA); a user
+        # with no row yet, or a project without the table, sums the ledger.
+        try:
+            data = self.client.table(XP_SUMMARY_TABLE).select("total").eq("user_id", self.user_id).execute().data
+            if data: return int(data[0]["total"])
+        except Exception:
+            pass
+        return self._sum_ledger()
+
+    def reconcile_xp(self) -> Tuple[int, int]:
+        data = self.client.table(XP_SUMMARY_TABLE).select("total").eq("user_id", self.user_id).execute().data
+        stored = int(data[0]["total"]) if data else 0
+        total = self._sum_ledger()
+        self.client.table(XP_SUMMARY_TABLE).upsert({"user_id": self.user_id, "total": total}, on_conflict="user_id").execute()
+        return stored, total
@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from .storage import Storage
+
+
+class WriteBehindQueue:
+    """Batches set and XP writes and flushes them from a background thread.
+
+    Each submit is appended to a JSONL journal before it is acknowledged and
+    the journal is rewritten as batches land, so anything still pending when
+    the backend is slow, unreachable or the process restarts is replayed in
+    order on the next start. A batch goes out through `Storage.write_batch`
+    (one round trip on Supabase). XP rows carry event keys and every set row
+    carries its op's id as `batch_id`, so a batch resent after a timeout or
+    replayed after a crash never double-inserts or double-awards.
+
+    A failure the storage calls permanent (`Storage.permanent_error`: bad
+    data, constraint or schema errors) is not retried: the batch is resent
+    one op at a time to find the op at fault, and that op is moved to
+    `rejected_path` (JSONL, with the error) so later writes aren't blocked.
+    """
+
+    def __init__(self, storage: Storage, journal_path: str, batch_max: int = 500,
+                 retry_delay: float = 0.5, max_backoff: float = 30.0):
+        self.storage = storage
+        self.journal_path = journal_path
+        self.batch_max = batch_max
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.last_flush_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.flushes = 0  # bumps after every batch that lands; readers use it to invalidate caches
+        self.rejected_path = os.path.splitext(journal_path)[0] + ".rejected.jsonl"
+        self.rejected = _count_lines(self.rejected_path)
+        self._pending = deque()  # ops: {"seq", "id", "sets", "xp"}
+        self._seq = 0
+        self._cv = threading.Condition()
+        self._replay()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    # --- producer side ---
+    def submit(self, sets: List[Dict] = (), xp: Optional[Dict] = None) -> int:
+        with self._cv:
+            self._seq += 1
+            op = _keyed({"seq": self._seq, "sets": list(sets), "xp": [xp] if xp else []})
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(op, default=str) + "\n")
+                f.flush(); os.fsync(f.fileno())
+            self._pending.append(op)
+            self._cv.notify()
+            return op["seq"]
+
+    def depth(self) -> int:
+        with self._cv:
+            return len(self._pending)
+
+    def pending_xp(self) -> int:
+        with self._cv:
+            return sum(int(r["xp"]) for op in self._pending for r in op["xp"])
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until the queue drains (or `timeout`); True if it drained."""
+        deadline = time.monotonic() + timeout
+        with self._cv:
+            self._cv.notify()
+            while self._pending:
+                left = deadline - time.monotonic()
+                if left <= 0: return False
+                self._cv.wait(left)
+        return True
+
+    # --- journal ---
+    def _replay(self):
+        if not os.path.exists(self.journal_path): return
+        with open(self.journal_path) as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        self._pending.append(_keyed(json.loads(line)))  # journals from before ids
+                    except ValueError:
+                        break  # torn final line from a crash mid-write
+        self._seq = max((op["seq"] for op in self._pending), default=0)
+        self._rewrite_journal()
+
+    def _rewrite_journal(self):
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w") as f:
+            for op in self._pending:
+                f.write(json.dumps(op, default=str) + "\n")
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def _reject(self, op: Dict, error: str):
+        with self._cv:
+            with open(self.rejected_path, "a") as f:
+                f.write(json.dumps(dict(op, error=error, rejected_at=time.strftime("%Y-%m-%dT%H:%M:%S")), default=str) + "\n")
+                f.flush(); os.fsync(f.fileno())
+            self._pending.popleft()  # the worker only ever sends from the head
+            self._rewrite_journal()
+            self.rejected += 1
+            self.last_error = None  # kept with the op in rejected_path; nothing is retrying it
+            self._cv.notify_all()
+
+    # --- worker ---
+    def _run(self):
+        backoff = self.retry_delay
+        isolate = False  # one op per send until the op behind a permanent failure is found
+        while True:
+            with self._cv:
+                while not self._pending:
+                    self._cv.wait()
+                batch, n_sets = [], 0
+                for op in self._pending:
+                    if batch and (isolate or n_sets + len(op["sets"]) > self.batch_max): break
+                    batch.append(op); n_sets += len(op["sets"])
+            sets = [r for op in batch for r in op["sets"]]
+            xp = [r for op in batch for r in op["xp"]]
+            t0 = time.perf_counter()
+            try:
+                self.storage.write_batch(sets, xp)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self.storage.permanent_error(e):
+                    if len(batch) == 1:
+                        self._reject(batch[0], self.last_error)
+                    isolate = len(batch) > 1
+                    continue
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = self.retry_delay
+            with self._cv:
+                for _ in batch: self._pending.popleft()
+                self._rewrite_journal()
+                self.last_flush_ms = (time.perf_counter() - t0) * 1000
+                self.last_error = None
+                self.flushes += 1
+                isolate = isolate and bool(self._pending)
+                self._cv.notify_all()
+
+
+def _keyed(op: Dict) -> Dict:
+    if "id" not in op:
+        op["id"] = uuid.uuid4().hex
+        op["sets"] = [dict(r, batch_id=op["id"]) for r in op["sets"]]
+    return op
+
+
+def _count_lines(path: str) -> int:
+    if not os.path.exists(path): return 0
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())